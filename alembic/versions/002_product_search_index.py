@@ -0,0 +1,45 @@
+"""product full-text search index
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+
+from app.core.search import PG_SEARCH_DOCUMENT
+from app.models.product import SQLITE_FTS_DDL
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Expression index; must match the document expression used by
+        # PostgresSearchBackend exactly for the planner to pick it up
+        op.execute(
+            "CREATE INDEX ix_products_search ON products USING GIN (({}))".format(
+                PG_SEARCH_DOCUMENT.format(t="")
+            )
+        )
+    elif dialect == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_products_search")
+    elif dialect == 'sqlite':
+        for trigger in ('products_fts_ai', 'products_fts_ad', 'products_fts_au'):
+            op.execute("DROP TRIGGER IF EXISTS {}".format(trigger))
+        op.execute("DROP TABLE IF EXISTS products_fts")
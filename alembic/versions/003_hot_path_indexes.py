@@ -0,0 +1,47 @@
+"""indexes for listing filters and foreign keys
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Product listing: is_active + category_id + price range, and brand filter.
+    # Partial on Postgres/SQLite so inactive products stay out of the index.
+    op.create_index(
+        'ix_products_active_category_price', 'products', ['is_active', 'category_id', 'price'],
+        postgresql_where=sa.text('is_active'), sqlite_where=sa.text('is_active = 1')
+    )
+    op.create_index(
+        'ix_products_brand', 'products', ['brand'],
+        postgresql_where=sa.text('is_active'), sqlite_where=sa.text('is_active = 1')
+    )
+
+    # Foreign keys walked on every cart, order, review and wishlist read
+    op.create_index(op.f('ix_cart_items_cart_id'), 'cart_items', ['cart_id'], unique=False)
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+    op.create_index(op.f('ix_order_items_product_id'), 'order_items', ['product_id'], unique=False)
+    op.create_index('ix_reviews_product_created', 'reviews', ['product_id', 'created_at'], unique=False)
+    op.create_index('ix_wishlist_user_product', 'wishlist', ['user_id', 'product_id'], unique=False)
+    op.create_index('ix_orders_user_created', 'orders', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_user_created', table_name='orders')
+    op.drop_index('ix_wishlist_user_product', table_name='wishlist')
+    op.drop_index('ix_reviews_product_created', table_name='reviews')
+    op.drop_index(op.f('ix_order_items_product_id'), table_name='order_items')
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_index(op.f('ix_cart_items_cart_id'), table_name='cart_items')
+    op.drop_index('ix_products_brand', table_name='products')
+    op.drop_index('ix_products_active_category_price', table_name='products')
@@ -0,0 +1,31 @@
+"""cache versions table
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    cache_versions = op.create_table('cache_versions',
+        sa.Column('scope', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('scope')
+    )
+    op.bulk_insert(cache_versions, [
+        {'scope': 'categories', 'version': 0},
+        {'scope': 'banners', 'version': 0},
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table('cache_versions')
@@ -0,0 +1,40 @@
+"""indexes for product listing sorts
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+# name -> columns; price within a category is served by
+# ix_products_active_category_price
+SORT_INDEXES = {
+    'ix_products_sort_price': ['price', 'id'],
+    'ix_products_sort_created': ['created_at', 'id'],
+    'ix_products_category_sort_created': ['category_id', 'created_at', 'id'],
+    'ix_products_sort_rating': ['rating', 'id'],
+    'ix_products_category_sort_rating': ['category_id', 'rating', 'id'],
+    'ix_products_sort_reviews': ['review_count', 'id'],
+    'ix_products_category_sort_reviews': ['category_id', 'review_count', 'id'],
+}
+
+
+def upgrade() -> None:
+    for name, columns in SORT_INDEXES.items():
+        op.create_index(
+            name, 'products', columns,
+            postgresql_where=sa.text('is_active'), sqlite_where=sa.text('is_active = 1')
+        )
+
+
+def downgrade() -> None:
+    for name in reversed(list(SORT_INDEXES)):
+        op.drop_index(name, table_name='products')
@@ -0,0 +1,33 @@
+"""product trigram index for fuzzy search
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+
+from app.core.search import PG_TRIGRAM_DOCUMENT
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Other engines use the in-process trigram index in app/core/search.py
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # Expression index; must match PostgresTrigramBackend's document exactly
+        op.execute(
+            "CREATE INDEX ix_products_trigram ON products USING GIN (({}) gin_trgm_ops)".format(
+                PG_TRIGRAM_DOCUMENT.format(t="")
+            )
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_products_trigram")
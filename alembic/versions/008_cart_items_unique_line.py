@@ -0,0 +1,44 @@
+"""one cart line per product
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+
+    # Fold duplicate lines into the oldest one before enforcing uniqueness
+    duplicates = connection.execute(sa.text(
+        "SELECT MIN(id) AS id, SUM(quantity) AS quantity FROM cart_items "
+        "GROUP BY cart_id, product_id HAVING COUNT(*) > 1"
+    )).all()
+    if duplicates:
+        connection.execute(
+            sa.text("UPDATE cart_items SET quantity = :quantity WHERE id = :id"),
+            [{"id": row.id, "quantity": row.quantity} for row in duplicates]
+        )
+        # Derived table so MySQL accepts a subquery on the table being changed
+        connection.execute(sa.text(
+            "DELETE FROM cart_items WHERE id NOT IN ("
+            "SELECT id FROM (SELECT MIN(id) AS id FROM cart_items GROUP BY cart_id, product_id) AS keep)"
+        ))
+
+    # The unique index leads with cart_id, so it also serves cart lookups
+    op.create_index('uq_cart_items_cart_product', 'cart_items', ['cart_id', 'product_id'], unique=True)
+    op.drop_index(op.f('ix_cart_items_cart_id'), table_name='cart_items')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_cart_items_cart_id'), 'cart_items', ['cart_id'], unique=False)
+    op.drop_index('uq_cart_items_cart_product', table_name='cart_items')
@@ -0,0 +1,28 @@
+"""guest carts
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Guest carts have no user; batch mode so SQLite can alter the column
+    with op.batch_alter_table('carts') as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM cart_items WHERE cart_id IN (SELECT id FROM carts WHERE user_id IS NULL)")
+    op.execute("DELETE FROM carts WHERE user_id IS NULL")
+    with op.batch_alter_table('carts') as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=False)
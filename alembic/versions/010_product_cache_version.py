@@ -0,0 +1,25 @@
+"""product cache version row
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Product ETags are built from this row on every worker
+    cache_versions = sa.table('cache_versions', sa.column('scope', sa.String), sa.column('version', sa.Integer))
+    op.bulk_insert(cache_versions, [{'scope': 'products', 'version': 0}])
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM cache_versions WHERE scope = 'products'")
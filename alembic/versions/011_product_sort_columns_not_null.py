@@ -0,0 +1,49 @@
+"""product sort columns not null
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.product import SQLITE_FTS_DDL
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+# Keyset pagination compares these columns, and a NULL never compares,
+# so listings sorted by them must not contain NULLs
+SORT_COLUMNS = [
+    ('rating', sa.Float(), "0"),
+    ('review_count', sa.Integer(), "0"),
+    ('created_at', sa.DateTime(), "COALESCE(updated_at, CURRENT_TIMESTAMP)"),
+]
+
+
+def upgrade() -> None:
+    for name, _, backfill in SORT_COLUMNS:
+        op.execute("UPDATE products SET {0} = {1} WHERE {0} IS NULL".format(name, backfill))
+
+    with op.batch_alter_table('products') as batch_op:
+        for name, type_, _ in SORT_COLUMNS:
+            batch_op.alter_column(name, existing_type=type_, nullable=False)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        # Batch mode rebuilds the table on SQLite, which drops its triggers
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('products') as batch_op:
+        for name, type_, _ in SORT_COLUMNS:
+            batch_op.alter_column(name, existing_type=type_, nullable=True)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
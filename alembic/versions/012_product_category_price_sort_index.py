@@ -0,0 +1,28 @@
+"""index for product listings sorted by price within a category
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ix_products_active_category_price has no id, so keyset pages sorted by
+    # price within a category still had to sort the ties
+    op.create_index(
+        'ix_products_category_sort_price', 'products', ['category_id', 'price', 'id'],
+        postgresql_where=sa.text('is_active'), sqlite_where=sa.text('is_active = 1')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_category_sort_price', table_name='products')
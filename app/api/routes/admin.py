@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.core.database import get_db
+from sqlalchemy import func, select
+import csv
+import io
+import json
+from typing import Any, Dict, List, Optional
+from app.core.database import get_db, SessionLocal
 from app.api.deps import get_current_admin
+from app.core.autocomplete import autocomplete
+from app.core.catalog_import import import_products, read_records
+from app.core.catalog_updates import apply_price_stock_updates
+from app.core.reference_cache import bump_version
+from app.core.cache import product_cache, product_list_cache, facet_cache, count_cache, invalidate_catalog
 from app.models.user import User
 from app.models.product import Product
 from app.models.order import Order
 
 router = APIRouter()
 
+MAX_BULK_UPDATES = 10000
+
 
 @router.get("/admin/stats")
 def get_admin_stats(
@@ -180,6 +192,116 @@ def delete_user(
     return {"message": "User deleted successfully"}
 
 
+# Columns written by the catalog export, in output order
+EXPORT_COLUMNS = [
+    Product.id, Product.name, Product.slug, Product.description, Product.price,
+    Product.discount_price, Product.brand, Product.sku, Product.stock, Product.images,
+    Product.category_id, Product.is_featured, Product.is_active, Product.rating,
+    Product.review_count, Product.created_at, Product.updated_at,
+]
+EXPORT_CHUNK_SIZE = 1000
+
+
+def _export_rows():
+    # Own session: the request-scoped one is closed before streaming starts
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(*EXPORT_COLUMNS).order_by(Product.id).execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _export_ndjson():
+    for rows in _export_rows():
+        yield "".join(json.dumps(dict(row._mapping), default=_json_default) + "\n" for row in rows)
+
+
+def _export_csv():
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.key for column in EXPORT_COLUMNS])
+    for rows in _export_rows():
+        for row in rows:
+            values = dict(row._mapping)
+            values["images"] = "|".join(values["images"] or [])
+            writer.writerow(values.values())
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+@router.get("/admin/products/export")
+def export_products(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    current_user = Depends(get_current_admin)
+):
+    if format == "csv":
+        return StreamingResponse(
+            _export_csv(),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=products.csv"}
+        )
+    return StreamingResponse(
+        _export_ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=products.ndjson"}
+    )
+
+
+@router.post("/admin/products/import")
+def import_products_file(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin)
+):
+    if not format:
+        format = "jsonl" if (file.filename or "").endswith((".jsonl", ".ndjson")) else "csv"
+    
+    # Read the upload line by line instead of loading it into memory
+    lines = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    try:
+        report = import_products(db, read_records(lines, format))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    finally:
+        lines.detach()
+    
+    return report.as_dict()
+
+
+@router.patch("/admin/products/bulk")
+def bulk_update_products(
+    # Validated per record so one bad row is reported instead of failing the batch
+    updates: List[Dict[str, Any]],
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_admin)
+):
+    if len(updates) > MAX_BULK_UPDATES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_UPDATES} updates per request")
+    
+    return apply_price_stock_updates(db, updates)
+
+
+@router.get("/admin/cache/stats")
+def get_cache_stats(current_user = Depends(get_current_admin)):
+    return {
+        "products": product_cache.stats(),
+        "product_lists": product_list_cache.stats(),
+        "facets": facet_cache.stats(),
+        "counts": count_cache.stats(),
+    }
+
+
 # Category Management
 @router.get("/admin/categories")
 def get_all_categories(
@@ -222,8 +344,11 @@ def update_category(
     if "is_active" in category_data:
         category.is_active = category_data["is_active"]
     
+    bump_version(db, "categories")
     db.commit()
+    invalidate_catalog()
     db.refresh(category)
+    autocomplete.category_changed(category)
     
     return {
         "id": category.id,
@@ -255,5 +380,8 @@ def delete_category(
         )
     
     db.delete(category)
+    bump_version(db, "categories")
     db.commit()
+    invalidate_catalog()
+    autocomplete.category_removed(category_id)
     return {"message": "Category deleted successfully"}
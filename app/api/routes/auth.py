@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
+from typing import Optional
+from app.core.cache import cart_summary_cache
+from app.core.carts import CART_TOKEN_HEADER, guest_cart_id, merge_guest_cart
 from app.core.database import get_db
 from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
 from app.models.user import User
@@ -10,7 +13,11 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=Token)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+def register(
+    user_data: UserCreate,
+    cart_token: Optional[str] = Header(None, alias=CART_TOKEN_HEADER),
+    db: Session = Depends(get_db)
+):
     # Check if user exists
     if db.query(User).filter(User.email == user_data.email).first():
         raise HTTPException(
@@ -33,13 +40,14 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         hashed_password=get_password_hash(user_data.password)
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    db.flush()
     
-    # Create cart for user
-    cart = Cart(user_id=user.id)
-    db.add(cart)
+    # Create cart for user, adopting the guest cart if there is one
+    guest_id = guest_cart_id(cart_token)
+    if guest_id is None or not merge_guest_cart(db, guest_id, user.id):
+        db.add(Cart(user_id=user.id))
     db.commit()
+    db.refresh(user)
     
     # Generate tokens
     access_token = create_access_token({"sub": str(user.id)})
@@ -53,7 +61,11 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
+def login(
+    credentials: UserLogin,
+    cart_token: Optional[str] = Header(None, alias=CART_TOKEN_HEADER),
+    db: Session = Depends(get_db)
+):
     user = db.query(User).filter(User.email == credentials.email).first()
     
     if not user or not verify_password(credentials.password, user.hashed_password):
@@ -68,6 +80,11 @@ def login(credentials: UserLogin, db: Session = Depends(get_db)):
             detail="Inactive user"
         )
     
+    guest_id = guest_cart_id(cart_token)
+    if guest_id is not None and merge_guest_cart(db, guest_id, user.id):
+        db.commit()
+        cart_summary_cache.delete(user.id)
+    
     access_token = create_access_token({"sub": str(user.id)})
     refresh_token = create_refresh_token({"sub": str(user.id)})
     
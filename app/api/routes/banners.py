@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
 from app.api.deps import get_current_admin
+from app.core.reference_cache import bump_version, reference_cache
+from app.core.responses import dumps
 from app.models.banner import Banner
 from app.schemas.banner import BannerCreate, BannerResponse
 
@@ -10,8 +12,13 @@ router = APIRouter()
 
 
 @router.get("/banners", response_model=List[BannerResponse])
-def get_banners(db: Session = Depends(get_db)):
-    return db.query(Banner).filter(Banner.is_active == True).order_by(Banner.position).all()
+def get_banners(request: Request, db: Session = Depends(get_db)):
+    return reference_cache.response(request, db, "banners", _load_banners)
+
+
+def _load_banners(db: Session) -> bytes:
+    banners = db.query(Banner).filter(Banner.is_active == True).order_by(Banner.position).all()
+    return dumps([BannerResponse.model_validate(banner).model_dump(mode="json") for banner in banners])
 
 
 @router.post("/banners", response_model=BannerResponse)
@@ -22,6 +29,8 @@ def create_banner(
 ):
     banner = Banner(**banner_data.dict())
     db.add(banner)
+    bump_version(db, "banners")
     db.commit()
+    reference_cache.expire("banners")
     db.refresh(banner)
     return banner
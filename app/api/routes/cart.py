@@ -1,66 +1,163 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy import and_, func, literal, select
 from sqlalchemy.orm import Session
+from app.core.cache import cart_summary_cache
+from app.core.carts import CART_TOKEN_HEADER, create_user_cart, guest_cart_id, upsert_lines
 from app.core.database import get_db
-from app.api.deps import get_current_user
+from app.core.security import create_cart_token
+from app.api.deps import get_optional_user
 from app.models.cart import Cart, CartItem
 from app.models.product import Product
-from app.schemas.cart import CartResponse, CartItemCreate, CartItemUpdate
+from app.schemas.cart import (
+    CartResponse, CartItemCreate, CartItemUpdate, CartBatchRequest, CartSummaryResponse, CART_RESPONSE_LOAD,
+)
+from app.schemas.product import PRODUCT_RESPONSE_LOAD
 
 router = APIRouter()
 
+MAX_CART_OPERATIONS = 200
+
+
+class CartOwner:
+    """The signed-in user, or else the guest cart named by the X-Cart-Token header"""
+
+    def __init__(self, response: Response, user_id: Optional[int], guest_cart_id: Optional[int]):
+        self.response = response
+        self.user_id = user_id
+        self.guest_cart_id = guest_cart_id
+
+    @property
+    def condition(self):
+        if self.user_id is not None:
+            return Cart.user_id == self.user_id
+        return and_(Cart.id == self.guest_cart_id, Cart.user_id.is_(None))
+
+    @property
+    def cache_key(self):
+        return self.user_id if self.user_id is not None else ("guest", self.guest_cart_id)
+
+    def new_cart(self) -> Cart:
+        return Cart(user_id=self.user_id, items=[])
+
+    def cart_created(self, cart: Cart) -> None:
+        if self.user_id is None:
+            # Hand the new guest cart's token back to the client
+            self.guest_cart_id = cart.id
+            self.response.headers[CART_TOKEN_HEADER] = create_cart_token(cart.id)
+
+
+def get_cart_owner(
+    response: Response,
+    cart_token: Optional[str] = Header(None, alias=CART_TOKEN_HEADER),
+    current_user = Depends(get_optional_user)
+) -> CartOwner:
+    if current_user is not None:
+        return CartOwner(response, current_user.id, None)
+    return CartOwner(response, None, guest_cart_id(cart_token))
+
+
+# Each endpoint loads the cart with its items, products and categories in one
+# query, applies its change to those objects, and serializes the response
+# before committing so the commit doesn't expire what was just loaded.
+def _load_cart(db: Session, owner: CartOwner, create: bool = False):
+    query = db.query(Cart).options(*CART_RESPONSE_LOAD).filter(owner.condition)
+    cart = query.one_or_none()
+    if cart is not None or not create:
+        return cart
+    if owner.user_id is not None:
+        # Insert-if-absent, so concurrent first requests share one cart
+        create_user_cart(db, owner.user_id)
+        return query.one()
+    cart = owner.new_cart()
+    db.add(cart)
+    db.flush()
+    owner.cart_created(cart)
+    return cart
+
+
+def _find_item(cart: Cart, item_id: int) -> CartItem:
+    for cart_item in cart.items:
+        if cart_item.id == item_id:
+            return cart_item
+    raise HTTPException(status_code=404, detail="Cart item not found")
+
+
+def _commit(db: Session, owner: CartOwner, cart: Cart) -> CartResponse:
+    db.flush()
+    response = CartResponse.model_validate(cart)
+    db.commit()
+    cart_summary_cache.delete(owner.cache_key)
+    return response
+
 
 @router.get("/cart", response_model=CartResponse)
 def get_cart(
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    owner: CartOwner = Depends(get_cart_owner)
 ):
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
-    if not cart:
-        cart = Cart(user_id=current_user.id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
-    return cart
+    # Guests get a cart on their first write, not on a read
+    cart = _load_cart(db, owner, create=owner.user_id is not None)
+    if cart is None:
+        return CartResponse(id=None, items=[])
+    return _commit(db, owner, cart)
+
+
+def _upsert_line(db: Session, owner: CartOwner, product_id: int, quantity: int) -> bool:
+    # INSERT ... SELECT from carts x products, so a missing cart or product
+    # inserts nothing; an existing line gets the quantity added instead
+    rows = (
+        select(Cart.id, Product.id, literal(quantity), literal(datetime.utcnow()))
+        .join(Product, Product.id == product_id)
+        .where(owner.condition)
+    )
+    return upsert_lines(db, rows).rowcount > 0
+
+
+@router.get("/cart/summary", response_model=CartSummaryResponse)
+def get_cart_summary(
+    db: Session = Depends(get_db),
+    owner: CartOwner = Depends(get_cart_owner)
+):
+    summary = cart_summary_cache.get(owner.cache_key)
+    if summary is not None:
+        return summary
+    
+    # One aggregate over the user's lines; no cart, items or products loaded
+    line_count, item_count, subtotal = db.execute(
+        select(
+            func.count(CartItem.id),
+            func.coalesce(func.sum(CartItem.quantity), 0),
+            func.coalesce(func.sum(CartItem.quantity * func.coalesce(Product.discount_price, Product.price)), 0),
+        )
+        .select_from(Cart)
+        .join(CartItem, CartItem.cart_id == Cart.id)
+        .join(Product, Product.id == CartItem.product_id)
+        .where(owner.condition)
+    ).one()
+    
+    summary = {"line_count": line_count, "item_count": item_count, "subtotal": round(subtotal, 2)}
+    cart_summary_cache.set(owner.cache_key, summary)
+    return summary
 
 
 @router.post("/cart/items", response_model=CartResponse)
 def add_to_cart(
     item_data: CartItemCreate,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    owner: CartOwner = Depends(get_cart_owner)
 ):
-    # Check if product exists
-    product = db.query(Product).filter(Product.id == item_data.product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
+    # One statement, race-free against concurrent adds of the same product
+    if not _upsert_line(db, owner, item_data.product_id, item_data.quantity):
+        # Check if product exists
+        if db.query(Product.id).filter(Product.id == item_data.product_id).first() is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+        # First add for this user: create the cart and try again
+        _load_cart(db, owner, create=True)
+        _upsert_line(db, owner, item_data.product_id, item_data.quantity)
     
-    # Get or create cart
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
-    if not cart:
-        cart = Cart(user_id=current_user.id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
-    
-    # Check if item already in cart
-    cart_item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == item_data.product_id
-    ).first()
-    
-    if cart_item:
-        cart_item.quantity += item_data.quantity
-    else:
-        cart_item = CartItem(
-            cart_id=cart.id,
-            product_id=item_data.product_id,
-            quantity=item_data.quantity
-        )
-        db.add(cart_item)
-    
-    db.commit()
-    db.refresh(cart)
-    return cart
+    return _commit(db, owner, _load_cart(db, owner))
 
 
 @router.put("/cart/items/{item_id}", response_model=CartResponse)
@@ -68,60 +165,88 @@ def update_cart_item(
     item_id: int,
     item_data: CartItemUpdate,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    owner: CartOwner = Depends(get_cart_owner)
 ):
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    cart = _load_cart(db, owner)
     if not cart:
         raise HTTPException(status_code=404, detail="Cart not found")
     
-    cart_item = db.query(CartItem).filter(
-        CartItem.id == item_id,
-        CartItem.cart_id == cart.id
-    ).first()
-    
-    if not cart_item:
-        raise HTTPException(status_code=404, detail="Cart item not found")
-    
-    cart_item.quantity = item_data.quantity
-    db.commit()
-    db.refresh(cart)
-    return cart
+    _find_item(cart, item_id).quantity = item_data.quantity
+    return _commit(db, owner, cart)
 
 
 @router.delete("/cart/items/{item_id}", response_model=CartResponse)
 def remove_from_cart(
     item_id: int,
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    owner: CartOwner = Depends(get_cart_owner)
 ):
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    cart = _load_cart(db, owner)
     if not cart:
         raise HTTPException(status_code=404, detail="Cart not found")
     
-    cart_item = db.query(CartItem).filter(
-        CartItem.id == item_id,
-        CartItem.cart_id == cart.id
-    ).first()
+    cart.items.remove(_find_item(cart, item_id))
+    return _commit(db, owner, cart)
+
+
+@router.post("/cart/batch", response_model=CartResponse)
+def batch_update_cart(
+    batch: CartBatchRequest,
+    db: Session = Depends(get_db),
+    owner: CartOwner = Depends(get_cart_owner)
+):
+    if len(batch.operations) > MAX_CART_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_CART_OPERATIONS} operations per request")
     
-    if not cart_item:
-        raise HTTPException(status_code=404, detail="Cart item not found")
+    cart = _load_cart(db, owner, create=True)
+    lines = {item.product_id: item for item in cart.items}
     
-    db.delete(cart_item)
-    db.commit()
-    db.refresh(cart)
-    return cart
+    # Work out the final quantity per product first, applying operations in
+    # order, so lines added and removed within the batch never hit the database
+    quantities = {product_id: item.quantity for product_id, item in lines.items()}
+    for operation in batch.operations:
+        if operation.op == "remove":
+            quantities.pop(operation.product_id, None)
+        elif operation.op == "add":
+            quantities[operation.product_id] = quantities.get(operation.product_id, 0) + operation.quantity
+        else:
+            quantities[operation.product_id] = operation.quantity
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+    
+    # Products not yet in the cart, checked with a single IN query
+    new_ids = quantities.keys() - lines.keys()
+    products = {}
+    if new_ids:
+        products = {
+            product.id: product
+            for product in db.query(Product).options(*PRODUCT_RESPONSE_LOAD).filter(Product.id.in_(new_ids))
+        }
+        missing = sorted(new_ids - products.keys())
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Products not found: {', '.join(map(str, missing))}")
+    
+    for product_id, cart_item in lines.items():
+        if product_id not in quantities:
+            cart.items.remove(cart_item)
+        elif cart_item.quantity != quantities[product_id]:
+            cart_item.quantity = quantities[product_id]
+    for product_id in sorted(new_ids):
+        cart.items.append(CartItem(product=products[product_id], quantity=quantities[product_id]))
+    
+    return _commit(db, owner, cart)
 
 
 @router.delete("/cart/clear", response_model=CartResponse)
 def clear_cart(
     db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
+    owner: CartOwner = Depends(get_cart_owner)
 ):
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
-    if not cart:
+    cart_id = db.query(Cart.id).filter(owner.condition).scalar()
+    if cart_id is None:
         raise HTTPException(status_code=404, detail="Cart not found")
     
-    db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
+    # One DELETE; nothing needs to be loaded to return an empty cart
+    db.query(CartItem).filter(CartItem.cart_id == cart_id).delete(synchronize_session=False)
     db.commit()
-    db.refresh(cart)
-    return cart
+    cart_summary_cache.delete(owner.cache_key)
+    return CartResponse(id=cart_id, items=[])
@@ -1,34 +1,47 @@
+import random
+import time
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Tuple
 from datetime import datetime
+from app.core.cache import cart_summary_cache, product_cache
 from app.core.database import get_db
+from app.core.inventory import InsufficientStock, is_lock_conflict, reserve_stock, stock_shortages
 from app.api.deps import get_current_user, get_current_admin
 from app.models.order import Order, OrderItem
 from app.models.cart import Cart, CartItem
-from app.schemas.order import OrderCreate, OrderResponse
+from app.schemas.order import OrderCreate, OrderResponse, ORDER_RESPONSE_LOAD
 
 router = APIRouter()
 
+CHECKOUT_ATTEMPTS = 5
+CHECKOUT_RETRY_DELAY = 0.05
 
-@router.post("/orders", response_model=OrderResponse)
-def create_order(
-    order_data: OrderCreate,
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
-):
+
+def _place_order(db: Session, order_data: OrderCreate, user_id: int) -> Tuple[Order, List[int]]:
+    """Reserve stock, write the order and empty the cart in one transaction.
+
+    Returns the order and the ids of the products it took stock from.
+    """
     # Get cart
-    cart = db.query(Cart).filter(Cart.user_id == current_user.id).first()
+    cart = db.query(Cart).options(
+        selectinload(Cart.items).joinedload(CartItem.product)
+    ).filter(Cart.user_id == user_id).first()
     if not cart or not cart.items:
         raise HTTPException(status_code=400, detail="Cart is empty")
     
+    # Reserve stock for every line before anything else is written
+    quantities = {item.product_id: item.quantity for item in cart.items}
+    reserve_stock(db, quantities)
+    
     # Calculate total
     total_amount = sum(item.product.price * item.quantity for item in cart.items)
     
     # Create order
-    order_number = f"ORD-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{current_user.id}"
+    order_number = f"ORD-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{user_id}"
     order = Order(
-        user_id=current_user.id,
+        user_id=user_id,
         order_number=order_number,
         total_amount=total_amount,
         shipping_address=order_data.shipping_address,
@@ -51,6 +64,51 @@ def create_order(
     db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
     
     db.commit()
+    return order, list(quantities)
+
+
+@router.post("/orders", response_model=OrderResponse)
+def create_order(
+    order_data: OrderCreate,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_user)
+):
+    user_id = current_user.id
+    
+    # Checkouts racing for the same products either lose a lock or find the
+    # stock they read already taken; both are retried from the start
+    for attempt in range(CHECKOUT_ATTEMPTS):
+        if attempt:
+            time.sleep(random.uniform(0, CHECKOUT_RETRY_DELAY * 2 ** attempt))
+        try:
+            order, product_ids = _place_order(db, order_data, user_id)
+            break
+        except InsufficientStock as e:
+            db.rollback()
+            shortages = stock_shortages(db, e.quantities)
+            if shortages:
+                raise HTTPException(
+                    status_code=409,
+                    detail={"message": "Insufficient stock", "items": shortages}
+                )
+        except DBAPIError as e:
+            db.rollback()
+            if not is_lock_conflict(e):
+                raise
+    else:
+        raise HTTPException(
+            status_code=503,
+            detail="Checkout is busy, please try again",
+            headers={"Retry-After": "1"}
+        )
+    
+    cart_summary_cache.delete(user_id)
+    # Stock is part of every product response. Only this worker's copies of
+    # these products are dropped: bumping the catalog version would make every
+    # checkout contend on one row and flush all list caches everywhere, so
+    # stock in listings, ETags and other workers may lag by the cache TTL
+    for product_id in product_ids:
+        product_cache.delete(product_id)
     db.refresh(order)
     return order
 
@@ -60,7 +118,7 @@ def get_orders(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    orders = db.query(Order).filter(Order.user_id == current_user.id).order_by(Order.created_at.desc()).all()
+    orders = db.query(Order).options(*ORDER_RESPONSE_LOAD).filter(Order.user_id == current_user.id).order_by(Order.created_at.desc()).all()
     return orders
 
 
@@ -70,7 +128,7 @@ def get_order(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    order = db.query(Order).filter(
+    order = db.query(Order).options(*ORDER_RESPONSE_LOAD).filter(
         Order.id == order_id,
         Order.user_id == current_user.id
     ).first()
@@ -86,7 +144,7 @@ def get_all_orders(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_admin)
 ):
-    orders = db.query(Order).order_by(Order.created_at.desc()).all()
+    orders = db.query(Order).options(*ORDER_RESPONSE_LOAD).order_by(Order.created_at.desc()).all()
     return orders
 
 
@@ -1,28 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import String, case, cast, func, literal, null, select, union_all
 from typing import List, Optional
 from app.core.database import get_db
 from app.api.deps import get_current_admin
+from app.core.autocomplete import MAX_SUGGESTIONS, autocomplete
+from app.core.cache import product_cache, product_list_cache, facet_cache, invalidate_product
+from app.core.counts import count_rows
+from app.core.http_cache import catalog_versions, not_modified
+from app.core.reference_cache import bump_version, reference_cache
+from app.core.responses import RawJSONResponse, dumps, join_array
+from app.core.search import fuzzy_backend, search_backend
+from app.core.pagination import encode_cursor, decode_cursor, cursor_value, keyset_filter
 from app.models.product import Product, Category
-from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse, CategoryCreate, CategoryResponse
+from app.models.related import RelatedProduct
+from app.schemas.product import (
+    ProductCreate, ProductUpdate, ProductResponse, ProductBatchResponse, CategoryCreate, CategoryResponse,
+    PRODUCT_RESPONSE_LOAD,
+)
 
 router = APIRouter()
 
 
-@router.get("/products")
-def get_products(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(1000, ge=1, le=1000),
-    category_id: Optional[str] = Query(None),
-    search: Optional[str] = Query(None),
-    min_price: Optional[str] = Query(None),
-    max_price: Optional[str] = Query(None),
-    brand: Optional[str] = Query(None),
-    is_featured: Optional[bool] = Query(None),
-    db: Session = Depends(get_db)
+MAX_BATCH_IDS = 200
+
+# Upper bounds of the price histogram buckets; the last bucket is open-ended
+PRICE_BUCKETS = [25, 50, 100, 250, 500, 1000]
+
+# Listing sort keys: name -> (column, descending); ties break on id in the
+# same direction. Each is backed by a (sort column, id) index and a
+# (category_id, sort column, id) index, see app/models/product.py
+PRODUCT_SORTS = {
+    "id": (Product.id, False),
+    "price_asc": (Product.price, False),
+    "price_desc": (Product.price, True),
+    "newest": (Product.created_at, True),
+    "rating": (Product.rating, True),
+    "popularity": (Product.review_count, True),
+}
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+def _filter_products(
+    query,
+    category_id: Optional[str] = None,
+    search: Optional[str] = None,
+    min_price: Optional[str] = None,
+    max_price: Optional[str] = None,
+    brand: Optional[str] = None,
+    is_featured: Optional[bool] = None,
+    fuzzy: bool = False,
 ):
-    query = db.query(Product).filter(Product.is_active == True)
+    query = query.filter(Product.is_active == True)
     
     # Handle category_id (convert from string and check if not empty)
     if category_id and category_id.strip():
@@ -32,15 +63,9 @@ def get_products(
         except ValueError:
             pass
     
-    # Handle search
+    # Handle search (served by the full-text or trigram index)
     if search and search.strip():
-        query = query.filter(
-            or_(
-                Product.name.ilike(f"%{search}%"),
-                Product.description.ilike(f"%{search}%"),
-                Product.brand.ilike(f"%{search}%")
-            )
-        )
+        query = (fuzzy_backend if fuzzy else search_backend).filter(query, search)
     
     if min_price and min_price.strip():
         try:
@@ -62,42 +87,345 @@ def get_products(
     if is_featured is not None:
         query = query.filter(Product.is_featured == is_featured)
     
-    total = query.count()
-    products = query.offset(skip).limit(limit).all()
+    return query
+
+
+def _filter_key(category_id, search, min_price, max_price, brand, is_featured, fuzzy) -> tuple:
+    # Normalized filter set, used as a cache key
+    return (
+        (category_id or "").strip(), (search or "").strip().lower(),
+        (min_price or "").strip(), (max_price or "").strip(),
+        (brand or "").strip(), is_featured, fuzzy,
+    )
+
+
+def _first_image(product: Product):
+    return product.images[0] if product.images else None
+
+
+# Listing fields: name -> (backing column, value getter)
+PRODUCT_FIELDS = {
+    "id": (Product.id, lambda product: product.id),
+    "name": (Product.name, lambda product: product.name),
+    "slug": (Product.slug, lambda product: product.slug),
+    "description": (Product.description, lambda product: product.description),
+    "price": (Product.price, lambda product: product.price),
+    "discount_price": (Product.discount_price, lambda product: product.discount_price),
+    "brand": (Product.brand, lambda product: product.brand),
+    "sku": (Product.sku, lambda product: product.sku),
+    "stock": (Product.stock, lambda product: product.stock),
+    "images": (Product.images, lambda product: product.images or []),
+    "image": (Product.images, _first_image),
+    "category_id": (Product.category_id, lambda product: product.category_id),
+    "is_featured": (Product.is_featured, lambda product: product.is_featured),
+    "is_active": (Product.is_active, lambda product: product.is_active),
+    "rating": (Product.rating, lambda product: product.rating),
+    "review_count": (Product.review_count, lambda product: product.review_count),
+    "created_at": (Product.created_at, lambda product: product.created_at.isoformat() if product.created_at else None),
+}
+
+# Named field sets accepted by ?fields=
+PRODUCT_FIELD_PROFILES = {
+    "card": ("id", "name", "price", "discount_price", "image", "rating"),
+    "full": tuple(name for name in PRODUCT_FIELDS if name != "image"),
+}
+
+
+def _parse_fields(fields: Optional[str]) -> tuple:
+    if not fields or not fields.strip():
+        return PRODUCT_FIELD_PROFILES["full"]
+    if fields.strip() in PRODUCT_FIELD_PROFILES:
+        return PRODUCT_FIELD_PROFILES[fields.strip()]
     
+    names = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in PRODUCT_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def _load_fields(fields: tuple, *extra_columns):
+    # Only load the columns the requested fields read
+    columns = dict.fromkeys([PRODUCT_FIELDS[name][0] for name in fields] + list(extra_columns))
+    return load_only(*columns)
+
+
+def _serialize_product(product: Product, fields: tuple = PRODUCT_FIELD_PROFILES["full"]) -> dict:
     # Convert to dict manually to avoid serialization issues
-    products_list = []
-    for product in products:
-        products_list.append({
-            "id": product.id,
-            "name": product.name,
-            "slug": product.slug,
-            "description": product.description,
-            "price": product.price,
-            "discount_price": product.discount_price,
-            "brand": product.brand,
-            "sku": product.sku,
-            "stock": product.stock,
-            "images": product.images or [],
-            "category_id": product.category_id,
-            "is_featured": product.is_featured,
-            "is_active": product.is_active,
-            "rating": product.rating,
-            "review_count": product.review_count,
-            "created_at": product.created_at.isoformat() if product.created_at else None,
-        })
-    
-    return {
-        "products": products_list
-    }
+    return {name: PRODUCT_FIELDS[name][1](product) for name in fields}
+
+
+def _product_blob(product: Product) -> bytes:
+    # Encoded ProductResponse JSON, the form kept in product_cache
+    return dumps(ProductResponse.model_validate(product).model_dump(mode="json"))
+
+
+@router.get("/products")
+def get_products(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; pass an empty value for the first page"),
+    sort: Optional[str] = Query(None, pattern="^(id|price_asc|price_desc|newest|rating|popularity)$"),
+    count: Optional[str] = Query(None, pattern="^(exact|estimated|cached|none)$", description="How to compute total; defaults to none"),
+    include_total: bool = Query(False, description="Same as count=exact"),
+    fields: Optional[str] = Query(None, description="Profile (card, full) or comma-separated field names"),
+    category_id: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    fuzzy: bool = Query(False, description="Typo-tolerant search on product names and brands"),
+    min_price: Optional[str] = Query(None),
+    max_price: Optional[str] = Query(None),
+    brand: Optional[str] = Query(None),
+    is_featured: Optional[bool] = Query(None),
+    db: Session = Depends(get_db)
+):
+    etag = catalog_versions.etag("products")
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    
+    if count is None:
+        count = "exact" if include_total else "none"
+    
+    selected = _parse_fields(fields)
+    filter_key = _filter_key(category_id, search, min_price, max_price, brand, is_featured, fuzzy)
+    cache_key = (skip, limit, cursor, sort, count, selected) + filter_key
+    cached = product_list_cache.get(cache_key)
+    if cached is not None:
+        return RawJSONResponse(cached, headers={"ETag": etag})
+    generation = product_list_cache.generation
+    
+    sort_column, descending = PRODUCT_SORTS[sort or "id"]
+    query = _filter_products(
+        db.query(Product).options(_load_fields(selected, sort_column)),
+        category_id=category_id,
+        search=search,
+        min_price=min_price,
+        max_price=max_price,
+        brand=brand,
+        is_featured=is_featured,
+        fuzzy=fuzzy,
+    )
+    
+    payload = {}
+    if count != "none":
+        payload["total"], payload["total_type"] = count_rows(db, query, count, filter_key)
+    
+    if descending:
+        order_by = (sort_column.desc(), Product.id.desc())
+    else:
+        order_by = (sort_column.asc(), Product.id.asc())
+    
+    if cursor is None:
+        # Legacy offset mode, best matches first when searching unless sorted
+        if search and search.strip() and not sort:
+            backend = fuzzy_backend if fuzzy else search_backend
+            query = query.order_by(backend.rank(search).desc(), Product.id)
+        else:
+            query = query.order_by(*order_by)
+        products = query.offset(skip).limit(limit or 1000).all()
+        payload["products"] = [_serialize_product(product, selected) for product in products]
+        body = dumps(payload)
+        product_list_cache.set(cache_key, body, generation)
+        return RawJSONResponse(body, headers={"ETag": etag})
+    
+    # Cursor mode: seek past the last row instead of scanning skipped rows
+    sort = sort or "id"
+    page_size = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort)
+        last_value = cursor_value(sort_column, last_value)
+        query = query.filter(keyset_filter(sort_column, Product.id, last_value, last_id, descending))
+    
+    query = query.order_by(*order_by)
+    
+    # Fetch one extra row to know whether another page exists
+    products = query.limit(page_size + 1).all()
+    has_more = len(products) > page_size
+    products = products[:page_size]
+    
+    next_cursor = None
+    if has_more:
+        last = products[-1]
+        next_cursor = encode_cursor(sort, [getattr(last, sort_column.key), last.id])
+    
+    payload["products"] = [_serialize_product(product, selected) for product in products]
+    payload["next_cursor"] = next_cursor
+    body = dumps(payload)
+    product_list_cache.set(cache_key, body, generation)
+    return RawJSONResponse(body, headers={"ETag": etag})
+
+
+@router.get("/products/facets")
+def get_product_facets(
+    request: Request,
+    response: Response,
+    category_id: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    fuzzy: bool = Query(False, description="Typo-tolerant search on product names and brands"),
+    min_price: Optional[str] = Query(None),
+    max_price: Optional[str] = Query(None),
+    brand: Optional[str] = Query(None),
+    is_featured: Optional[bool] = Query(None),
+    db: Session = Depends(get_db)
+):
+    etag = catalog_versions.etag("products", "categories")
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    response.headers["ETag"] = etag
+    
+    cache_key = _filter_key(category_id, search, min_price, max_price, brand, is_featured, fuzzy)
+    cached = facet_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    generation = facet_cache.generation
+    
+    price_bucket = case(
+        *[(Product.price < bound, index) for index, bound in enumerate(PRICE_BUCKETS)],
+        else_=len(PRICE_BUCKETS)
+    )
+    matches = _filter_products(
+        db.query(Product.brand, Product.category_id, price_bucket.label("price_bucket")),
+        category_id=category_id,
+        search=search,
+        min_price=min_price,
+        max_price=max_price,
+        brand=brand,
+        is_featured=is_featured,
+        fuzzy=fuzzy,
+    ).cte("matches")
+    
+    # All three facets in one round-trip: (facet, value, label, count) rows
+    brands = (
+        select(literal("brand"), matches.c.brand, null(), func.count())
+        .where(matches.c.brand.isnot(None))
+        .group_by(matches.c.brand)
+    )
+    categories = (
+        select(literal("category"), cast(Category.id, String), Category.name, func.count())
+        .select_from(matches.join(Category, Category.id == matches.c.category_id))
+        .group_by(Category.id, Category.name)
+    )
+    prices = (
+        select(literal("price"), cast(matches.c.price_bucket, String), null(), func.count())
+        .group_by(matches.c.price_bucket)
+    )
+    rows = db.execute(union_all(brands, categories, prices)).all()
+    
+    bounds = [0] + PRICE_BUCKETS + [None]
+    payload = {"total": 0, "brands": [], "categories": [], "price_ranges": []}
+    for facet, value, label, count in rows:
+        if facet == "brand":
+            payload["brands"].append({"value": value, "count": count})
+        elif facet == "category":
+            payload["categories"].append({"id": int(value), "name": label, "count": count})
+        else:
+            index = int(value)
+            payload["price_ranges"].append({"min": bounds[index], "max": bounds[index + 1], "count": count})
+            payload["total"] += count
+    
+    payload["brands"].sort(key=lambda item: (-item["count"], item["value"]))
+    payload["categories"].sort(key=lambda item: (-item["count"], item["name"]))
+    payload["price_ranges"].sort(key=lambda item: item["min"])
+    
+    facet_cache.set(cache_key, payload, generation)
+    return payload
+
+
+@router.get("/products/autocomplete")
+def autocomplete_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=MAX_SUGGESTIONS)
+):
+    return autocomplete.suggest(q, limit)
+
+
+@router.get("/products/batch", response_model=ProductBatchResponse)
+def get_products_batch(
+    request: Request,
+    ids: str = Query(..., description="Comma-separated product ids"),
+    db: Session = Depends(get_db)
+):
+    try:
+        product_ids = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not product_ids:
+        raise HTTPException(status_code=400, detail="No product ids given")
+    if len(product_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    
+    etag = catalog_versions.etag("products", "categories")
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    
+    blobs = {}
+    for product_id in product_ids:
+        cached = product_cache.get(product_id)
+        if cached is not None:
+            blobs[product_id] = cached
+    
+    # Resolve every cache miss with a single IN query
+    misses = [product_id for product_id in product_ids if product_id not in blobs]
+    if misses:
+        generation = product_cache.generation
+        products = db.query(Product).options(*PRODUCT_RESPONSE_LOAD).filter(Product.id.in_(misses)).all()
+        for product in products:
+            blobs[product.id] = _product_blob(product)
+            product_cache.set(product.id, blobs[product.id], generation)
+    
+    # Assemble the body from the pre-encoded records
+    found = join_array(blobs[product_id] for product_id in product_ids if product_id in blobs)
+    missing = dumps([product_id for product_id in product_ids if product_id not in blobs])
+    body = b'{"products":' + found + b',"missing":' + missing + b"}"
+    return RawJSONResponse(body, headers={"ETag": etag})
 
 
 @router.get("/products/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.id == product_id).first()
+def get_product(
+    product_id: int,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    etag = catalog_versions.etag("products", "categories")
+    unchanged = not_modified(request, etag)
+    if unchanged is not None:
+        return unchanged
+    
+    cached = product_cache.get(product_id)
+    if cached is not None:
+        return RawJSONResponse(cached, headers={"ETag": etag})
+    generation = product_cache.generation
+    
+    product = db.query(Product).options(*PRODUCT_RESPONSE_LOAD).filter(Product.id == product_id).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    
+    blob = _product_blob(product)
+    product_cache.set(product_id, blob, generation)
+    return RawJSONResponse(blob, headers={"ETag": etag})
+
+
+@router.get("/products/{product_id}/related", response_model=List[ProductResponse])
+def get_related_products(
+    product_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    # Precomputed by compute_related_products.py; served from the
+    # (product_id, rank) primary key
+    return (
+        db.query(Product)
+        .options(*PRODUCT_RESPONSE_LOAD)
+        .join(RelatedProduct, RelatedProduct.related_product_id == Product.id)
+        .filter(RelatedProduct.product_id == product_id, Product.is_active == True)
+        .order_by(RelatedProduct.rank)
+        .limit(limit)
+        .all()
+    )
 
 
 @router.post("/products", response_model=ProductResponse)
@@ -108,8 +436,13 @@ def create_product(
 ):
     product = Product(**product_data.dict())
     db.add(product)
+    db.flush()
+    search_backend.index_product(db, product)
+    fuzzy_backend.index_product(db, product)
     db.commit()
+    invalidate_product(product.id)
     db.refresh(product)
+    autocomplete.product_changed(product)
     return product
 
 
@@ -127,8 +460,13 @@ def update_product(
     for key, value in product_data.dict(exclude_unset=True).items():
         setattr(product, key, value)
     
+    db.flush()
+    search_backend.index_product(db, product)
+    fuzzy_backend.index_product(db, product)
     db.commit()
+    invalidate_product(product.id)
     db.refresh(product)
+    autocomplete.product_changed(product)
     return product
 
 
@@ -161,14 +499,23 @@ def delete_product(
     db.query(Review).filter(Review.product_id == product_id).delete()
     
     db.delete(product)
+    search_backend.remove_product(db, product_id)
+    fuzzy_backend.remove_product(db, product_id)
     db.commit()
+    invalidate_product(product_id)
+    autocomplete.product_removed(product_id)
     return {"message": "Product deleted successfully"}
 
 
 # Categories
 @router.get("/categories", response_model=List[CategoryResponse])
-def get_categories(db: Session = Depends(get_db)):
-    return db.query(Category).filter(Category.is_active == True).all()
+def get_categories(request: Request, db: Session = Depends(get_db)):
+    return reference_cache.response(request, db, "categories", _load_categories)
+
+
+def _load_categories(db: Session) -> bytes:
+    categories = db.query(Category).filter(Category.is_active == True).all()
+    return dumps([CategoryResponse.model_validate(category).model_dump(mode="json") for category in categories])
 
 
 @router.post("/categories", response_model=CategoryResponse)
@@ -179,6 +526,10 @@ def create_category(
 ):
     category = Category(**category_data.dict())
     db.add(category)
+    bump_version(db, "categories")
     db.commit()
+    catalog_versions.expire("categories")
+    reference_cache.expire("categories")
     db.refresh(category)
+    autocomplete.category_changed(category)
     return category
@@ -4,6 +4,7 @@ from sqlalchemy import func
 from typing import List
 from app.core.database import get_db
 from app.api.deps import get_current_user
+from app.core.cache import invalidate_product
 from app.models.review import Review
 from app.models.product import Product
 from app.schemas.review import ReviewCreate, ReviewResponse
@@ -51,6 +52,7 @@ def create_review(
     product.review_count = review_count + 1
     
     db.commit()
+    invalidate_product(product.id)
     db.refresh(review)
     return review
 
@@ -5,7 +5,7 @@ from app.core.database import get_db
 from app.api.deps import get_current_user
 from app.models.wishlist import Wishlist
 from app.models.product import Product
-from app.schemas.wishlist import WishlistResponse
+from app.schemas.wishlist import WishlistResponse, WISHLIST_RESPONSE_LOAD
 
 router = APIRouter()
 
@@ -15,7 +15,7 @@ def get_wishlist(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    wishlist = db.query(Wishlist).filter(Wishlist.user_id == current_user.id).all()
+    wishlist = db.query(Wishlist).options(*WISHLIST_RESPONSE_LOAD).filter(Wishlist.user_id == current_user.id).all()
     return wishlist
 
 
@@ -0,0 +1,287 @@
+"""Typeahead suggestions served from in-memory prefix indexes.
+
+Each worker builds the indexes in the background at startup, applies the
+product/category writes it serves itself, and rebuilds in the background
+every ``PRODUCT_CACHE_TTL`` seconds to pick up writes made elsewhere.
+Until the first build finishes, suggestions are empty rather than blocking.
+"""
+import bisect
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.search import tokenize
+from app.models.product import Product, Category
+
+MAX_SUGGESTIONS = 20
+
+
+class PrefixIndex:
+    """Sorted array of (key, item) pairs searched with bisect.
+
+    Every word suffix of a label is a key, so "galaxy" finds
+    "Samsung Galaxy S24". One- and two-character prefixes match a large
+    share of the index, so their best ``MAX_SUGGESTIONS`` items are kept
+    up to date on every write. Results for longer recent prefixes are
+    memoized and dropped when a write touches a key starting with that prefix.
+    """
+
+    MEMO_SIZE = 1024
+    SHORT_PREFIX_LENGTH = 2
+
+    def __init__(self):
+        self._entries: List[Tuple[str, Hashable]] = []
+        self._items: Dict[Hashable, Tuple[str, tuple, List[str]]] = {}
+        self._memo: "OrderedDict[Tuple[str, int], list]" = OrderedDict()
+        # Short prefix -> best items, best first
+        self._top: Dict[str, List[Hashable]] = {}
+
+    @staticmethod
+    def _keys(label: str) -> List[str]:
+        words = tokenize(label)
+        return list(dict.fromkeys(" ".join(words[index:]) for index in range(len(words))))
+
+    def _short_prefixes(self, keys: List[str]) -> set:
+        return {key[:length] for key in keys for length in range(1, self.SHORT_PREFIX_LENGTH + 1)}
+
+    def _score(self, item: Hashable) -> tuple:
+        return self._items[item][1]
+
+    def _scan(self, prefix: str, limit: int) -> List[Hashable]:
+        # (prefix,) sorts before every (prefix..., item) entry, so the slice
+        # [prefix, prefix + max code point) is exactly the keys with that prefix
+        start = bisect.bisect_left(self._entries, (prefix,))
+        end = bisect.bisect_left(self._entries, (prefix + "\U0010ffff",))
+        candidates = {item for _, item in self._entries[start:end]}
+        return heapq.nlargest(limit, candidates, key=self._score)
+
+    def _forget(self, keys: List[str]) -> None:
+        for prefix, limit in list(self._memo):
+            if any(key.startswith(prefix) for key in keys):
+                del self._memo[(prefix, limit)]
+
+    def load(self, rows) -> None:
+        """Bulk-load (item, label, score) rows into an empty index"""
+        for item, label, score in rows:
+            keys = self._keys(label)
+            self._items[item] = (label, score, keys)
+            self._entries.extend((key, item) for key in keys)
+        self._entries.sort()
+
+        heaps: Dict[str, list] = {}
+        for item, (_, score, keys) in self._items.items():
+            for prefix in self._short_prefixes(keys):
+                heap = heaps.setdefault(prefix, [])
+                # Items of one index share a type, so ties fall back to them
+                if len(heap) < MAX_SUGGESTIONS:
+                    heapq.heappush(heap, (score, item))
+                elif (score, item) > heap[0]:
+                    heapq.heapreplace(heap, (score, item))
+        self._top = {
+            prefix: [item for _, item in sorted(heap, reverse=True)]
+            for prefix, heap in heaps.items()
+        }
+
+    def upsert(self, item: Hashable, label: str, score: tuple) -> None:
+        self.remove(item)
+        keys = self._keys(label)
+        for key in keys:
+            bisect.insort(self._entries, (key, item))
+        self._items[item] = (label, score, keys)
+        self._forget(keys)
+        for prefix in self._short_prefixes(keys):
+            top = self._top.setdefault(prefix, [])
+            if len(top) < MAX_SUGGESTIONS or score > self._score(top[-1]):
+                top.append(item)
+                top.sort(key=self._score, reverse=True)
+                del top[MAX_SUGGESTIONS:]
+
+    def remove(self, item: Hashable) -> None:
+        existing = self._items.pop(item, None)
+        if existing is None:
+            return
+        for key in existing[2]:
+            index = bisect.bisect_left(self._entries, (key, item))
+            if index < len(self._entries) and self._entries[index] == (key, item):
+                del self._entries[index]
+        self._forget(existing[2])
+        for prefix in self._short_prefixes(existing[2]):
+            top = self._top.get(prefix)
+            if top is None or item not in top:
+                continue
+            if len(top) < MAX_SUGGESTIONS:
+                top.remove(item)
+            else:
+                # The list may have been cut short; refill it from the index
+                self._top[prefix] = self._scan(prefix, MAX_SUGGESTIONS)
+            if not self._top[prefix]:
+                del self._top[prefix]
+
+    def search(self, prefix: str, limit: int) -> List[Tuple[Hashable, str]]:
+        if len(prefix) <= self.SHORT_PREFIX_LENGTH and limit <= MAX_SUGGESTIONS:
+            return [(item, self._items[item][0]) for item in self._top.get(prefix, [])[:limit]]
+
+        memo_key = (prefix, limit)
+        if memo_key in self._memo:
+            self._memo.move_to_end(memo_key)
+            return self._memo[memo_key]
+
+        results = [(item, self._items[item][0]) for item in self._scan(prefix, limit)]
+
+        self._memo[memo_key] = results
+        if len(self._memo) > self.MEMO_SIZE:
+            self._memo.popitem(last=False)
+        return results
+
+
+class Autocomplete:
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._built_at: Optional[float] = None
+        self._rebuilding = False
+        self._state = None
+
+    def _build(self) -> dict:
+        products, brands, categories = PrefixIndex(), PrefixIndex(), PrefixIndex()
+        product_rows = []
+        product_brands: Dict[int, str] = {}
+        brand_counts: Dict[str, int] = {}
+
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(Product.id, Product.name, Product.brand, Product.rating, Product.review_count)
+                .where(Product.is_active == True)
+                .execution_options(yield_per=1000)
+            )
+            for row in rows:
+                product_rows.append((row.id, row.name, (row.review_count or 0, row.rating or 0)))
+                if row.brand:
+                    product_brands[row.id] = row.brand
+                    brand_counts[row.brand] = brand_counts.get(row.brand, 0) + 1
+
+            categories.load(
+                (category.id, category.name, (0,))
+                for category in db.execute(select(Category.id, Category.name).where(Category.is_active == True))
+            )
+        finally:
+            db.close()
+
+        products.load(product_rows)
+        brands.load((brand, brand, (count,)) for brand, count in brand_counts.items())
+
+        return {
+            "products": products,
+            "brands": brands,
+            "categories": categories,
+            "product_brands": product_brands,
+            "brand_counts": brand_counts,
+        }
+
+    def _rebuild_in_background(self) -> None:
+        try:
+            state = self._build()
+            with self._lock:
+                self._state = state
+                self._built_at = time.monotonic()
+        finally:
+            self._rebuilding = False
+
+    def start(self) -> None:
+        """Build the indexes in the background, e.g. at application startup"""
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def _ensure_state(self) -> Optional[dict]:
+        if self._state is None or time.monotonic() - self._built_at > self.max_age:
+            self.start()
+        return self._state
+
+    def mark_stale(self) -> None:
+        """Rebuild in the background on next use, e.g. after a bulk import"""
+        with self._lock:
+            if self._state is not None:
+                self._built_at = float("-inf")
+
+    def _set_brand_count(self, state: dict, brand: str, delta: int) -> None:
+        count = state["brand_counts"].get(brand, 0) + delta
+        if count > 0:
+            state["brand_counts"][brand] = count
+            state["brands"].upsert(brand, brand, (count,))
+        else:
+            state["brand_counts"].pop(brand, None)
+            state["brands"].remove(brand)
+
+    def product_changed(self, product: Product) -> None:
+        with self._lock:
+            state = self._state
+            if state is None:
+                return
+            self._remove_product(state, product.id)
+            if product.is_active:
+                state["products"].upsert(product.id, product.name, (product.review_count or 0, product.rating or 0))
+                if product.brand:
+                    state["product_brands"][product.id] = product.brand
+                    self._set_brand_count(state, product.brand, 1)
+
+    def product_removed(self, product_id: int) -> None:
+        with self._lock:
+            if self._state is not None:
+                self._remove_product(self._state, product_id)
+
+    def _remove_product(self, state: dict, product_id: int) -> None:
+        state["products"].remove(product_id)
+        brand = state["product_brands"].pop(product_id, None)
+        if brand:
+            self._set_brand_count(state, brand, -1)
+
+    def category_changed(self, category: Category) -> None:
+        with self._lock:
+            if self._state is None:
+                return
+            if category.is_active:
+                self._state["categories"].upsert(category.id, category.name, (0,))
+            else:
+                self._state["categories"].remove(category.id)
+
+    def category_removed(self, category_id: int) -> None:
+        with self._lock:
+            if self._state is not None:
+                self._state["categories"].remove(category_id)
+
+    def suggest(self, query: str, limit: int) -> dict:
+        prefix = " ".join(tokenize(query))
+        if not prefix:
+            return {"products": [], "brands": [], "categories": []}
+
+        with self._lock:
+            state = self._ensure_state()
+            if state is None:
+                return {"products": [], "brands": [], "categories": []}
+            return {
+                "products": [
+                    {"id": item, "name": label}
+                    for item, label in state["products"].search(prefix, limit)
+                ],
+                "brands": [
+                    {"name": label}
+                    for _, label in state["brands"].search(prefix, limit)
+                ],
+                "categories": [
+                    {"id": item, "name": label}
+                    for item, label in state["categories"].search(prefix, limit)
+                ],
+            }
+
+
+autocomplete = Autocomplete(max_age=settings.PRODUCT_CACHE_TTL)
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from .config import settings
+from .http_cache import catalog_versions
+from .reference_cache import reference_cache
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Every delete/clear advances ``generation``. A reader that takes the
+    generation before querying the database and passes it to ``set`` cannot
+    store a value an invalidation dropped while the query was running.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self.generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Encoded ProductResponse JSON keyed by product id
+product_cache = TTLCache(settings.PRODUCT_CACHE_SIZE, settings.PRODUCT_CACHE_TTL)
+
+# Encoded GET /api/products bodies keyed by normalized query parameters
+product_list_cache = TTLCache(settings.PRODUCT_CACHE_SIZE // 10 or 1, settings.PRODUCT_CACHE_TTL)
+
+# GET /api/products/facets responses keyed by normalized filter set
+facet_cache = TTLCache(settings.PRODUCT_CACHE_SIZE // 10 or 1, settings.PRODUCT_CACHE_TTL)
+
+# GET /api/cart/summary payloads keyed by user id. Cart writes drop their own
+# entry; the short TTL bounds staleness for writes served by other workers
+cart_summary_cache = TTLCache(settings.PRODUCT_CACHE_SIZE, settings.CART_SUMMARY_TTL)
+
+# Listing totals keyed by normalized filter set; only expire, so they may lag
+# writes by up to the TTL
+count_cache = TTLCache(settings.PRODUCT_CACHE_SIZE // 10 or 1, settings.PRODUCT_CACHE_TTL)
+
+
+def invalidate_product(*product_ids: int) -> None:
+    """Drop cached data for the given products (or every product) after a write commits"""
+    catalog_versions.bump("products")
+    if not product_ids:
+        product_cache.clear()
+    for product_id in product_ids:
+        product_cache.delete(product_id)
+    product_list_cache.clear()
+    facet_cache.clear()
+    # Subtotals depend on product prices
+    cart_summary_cache.clear()
+
+
+def invalidate_catalog() -> None:
+    """Drop all cached catalog data, e.g. after a category change"""
+    # Category writes bump their version in-transaction
+    catalog_versions.expire("categories")
+    reference_cache.expire("categories")
+    invalidate_product()
+
+
+def _drop_stale_catalog(scope: str) -> None:
+    # Another worker wrote; copies built from the old catalog must not be
+    # served under the new ETag
+    if scope in ("products", "categories"):
+        product_cache.clear()
+        product_list_cache.clear()
+        facet_cache.clear()
+        cart_summary_cache.clear()
+
+
+catalog_versions.subscribe(_drop_stale_catalog)
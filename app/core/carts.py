@@ -0,0 +1,96 @@
+"""Cart helpers shared by the cart and auth routes.
+
+Guest carts are ``carts`` rows without a user, named by a signed token the
+client sends in the ``X-Cart-Token`` header. Signing in or registering with
+that header merges the guest cart into the user's cart with set-based
+statements, however many lines it has.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.models.cart import Cart, CartItem
+
+from .database import dialect_insert
+from .security import decode_token
+
+CART_TOKEN_HEADER = "X-Cart-Token"
+
+
+def guest_cart_id(token: Optional[str]) -> Optional[int]:
+    """Cart id from a valid guest cart token, else None"""
+    payload = decode_token(token) if token else None
+    if not payload or payload.get("type") != "cart":
+        return None
+    try:
+        return int(payload["sub"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def create_user_cart(db: Session, user_id: int) -> None:
+    """Create the user's cart unless one exists.
+
+    Concurrent first requests may both get here; the unique ``user_id``
+    turns every insert but one into a no-op instead of an error.
+    """
+    dialect, insert = dialect_insert(db)
+    now = datetime.utcnow()
+    statement = insert(Cart.__table__).values(user_id=user_id, created_at=now, updated_at=now)
+    if dialect == "mysql":
+        statement = statement.on_duplicate_key_update(user_id=statement.inserted.user_id)
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=["user_id"])
+    db.execute(statement)
+
+
+def upsert_lines(db: Session, rows):
+    """Insert (cart_id, product_id, quantity, created_at) rows from a SELECT,
+    adding the quantity to the existing line on conflict"""
+    dialect, insert = dialect_insert(db)
+    table = CartItem.__table__
+    statement = insert(table).from_select(["cart_id", "product_id", "quantity", "created_at"], rows)
+    if dialect == "mysql":
+        statement = statement.on_duplicate_key_update(quantity=table.c.quantity + statement.inserted.quantity)
+    else:
+        statement = statement.on_conflict_do_update(
+            index_elements=["cart_id", "product_id"],
+            set_={"quantity": table.c.quantity + statement.excluded.quantity},
+        )
+    return db.execute(statement)
+
+
+def purge_guest_carts(db: Session, created_before: datetime) -> int:
+    """Delete guest carts created before ``created_before``; call before commit.
+
+    A guest cart's token expires ``GUEST_CART_EXPIRE_DAYS`` after the cart
+    is created, so older guest carts can no longer be reached.
+    """
+    expired = (Cart.user_id.is_(None), Cart.created_at < created_before)
+    db.execute(delete(CartItem).where(CartItem.cart_id.in_(select(Cart.id).where(*expired))))
+    return db.execute(delete(Cart).where(*expired)).rowcount
+
+
+def merge_guest_cart(db: Session, guest_id: int, user_id: int) -> bool:
+    """Move guest cart ``guest_id`` into the user's cart; call before commit.
+
+    A user without a cart adopts the guest cart in one UPDATE. Otherwise the
+    lines are copied over with one INSERT ... SELECT (quantities add up on
+    products already in the cart) and the guest cart is deleted. Returns
+    False if there is no such guest cart.
+    """
+    user_cart_id = db.execute(select(Cart.id).where(Cart.user_id == user_id)).scalar()
+    is_guest = (Cart.id == guest_id, Cart.user_id.is_(None))
+
+    if user_cart_id is None:
+        return db.execute(update(Cart).where(*is_guest).values(user_id=user_id)).rowcount > 0
+
+    upsert_lines(db, (
+        select(literal(user_cart_id), CartItem.product_id, CartItem.quantity, literal(datetime.utcnow()))
+        .join(Cart, Cart.id == CartItem.cart_id)
+        .where(*is_guest)
+    ))
+    db.execute(delete(CartItem).where(CartItem.cart_id.in_(select(Cart.id).where(*is_guest))))
+    return db.execute(delete(Cart).where(*is_guest)).rowcount > 0
@@ -0,0 +1,232 @@
+"""Streaming bulk import of products from CSV or JSON Lines.
+
+Rows are validated in chunks and each chunk is written as one executemany of
+a cached ``INSERT ... ON CONFLICT DO UPDATE`` (``ON DUPLICATE KEY UPDATE``
+on MySQL), which the Postgres and MySQL drivers send as multi-row VALUES
+batches. Rows with a ``sku`` are matched on sku, the rest on slug.
+An existing product only has the columns its row sets overwritten, so a
+file without e.g. a description column leaves descriptions alone.
+A chunk the database rejects is retried row by row so the offending rows
+can be reported individually.
+"""
+import csv
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.autocomplete import autocomplete
+from app.core.cache import invalidate_product
+from app.core.database import dialect_insert
+from app.core.search import fuzzy_backend, search_backend
+from app.models.product import Product, Category
+from app.schemas.product import ProductImportRow
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Columns an import may overwrite on an existing product, if its row sets
+# them; created_at, rating and review_count keep their stored values
+UPDATE_COLUMNS = [
+    "name", "slug", "description", "price", "discount_price", "brand", "sku", "stock",
+    "images", "category_id", "is_featured", "is_active",
+]
+
+
+def _csv_records(lines: Iterable[str]) -> Iterator[Tuple[int, dict]]:
+    reader = csv.DictReader(lines)
+    for row_number, row in enumerate(reader, start=2):
+        record = {key: value for key, value in row.items() if key and value not in (None, "")}
+        if "images" in record:
+            record["images"] = [image for image in record["images"].split("|") if image]
+        yield row_number, record
+
+
+def _jsonl_records(lines: Iterable[str]) -> Iterator[Tuple[int, dict]]:
+    for row_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, {"__error__": f"Invalid JSON: {e}"}
+            continue
+        if not isinstance(record, dict):
+            record = {"__error__": "Expected a JSON object"}
+        yield row_number, record
+
+
+def read_records(lines: Iterable[str], format: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (row number, raw record) pairs from CSV or JSONL text lines"""
+    if format == "csv":
+        return _csv_records(lines)
+    if format == "jsonl":
+        return _jsonl_records(lines)
+    raise ValueError(f"Unsupported import format: {format}")
+
+
+def _chunks(records: Iterator[Tuple[int, dict]], size: int) -> Iterator[List[Tuple[int, dict]]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+            for item in error.errors()
+        )
+    if isinstance(error, DBAPIError):
+        return str(error.orig).strip().splitlines()[0]
+    return str(error)
+
+
+def _upsert(db: Session, rows: List[dict], key: str, columns: Tuple[str, ...]) -> None:
+    dialect, insert = dialect_insert(db)
+    statement = insert(Product.__table__)
+    columns = columns + ("updated_at",)
+    if dialect == "mysql":
+        statement = statement.on_duplicate_key_update(
+            {column: statement.inserted[column] for column in columns}
+        )
+    else:
+        statement = statement.on_conflict_do_update(
+            index_elements=[key],
+            set_={column: statement.excluded[column] for column in columns},
+        )
+    # Core executemany: compiled once, no per-row ORM work
+    db.connection().execute(statement, rows)
+
+
+def _write(db: Session, rows: List[Tuple[dict, Tuple[str, ...]]]) -> None:
+    # One statement per match key and set of columns to overwrite
+    groups: Dict[Tuple[str, Tuple[str, ...]], List[dict]] = {}
+    for row, columns in rows:
+        groups.setdefault(("sku" if row["sku"] else "slug", columns), []).append(row)
+    for (key, columns), group in groups.items():
+        _upsert(db, group, key, columns)
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def error(self, row_number: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+def import_products(
+    db: Session,
+    records: Iterable[Tuple[int, dict]],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> ImportReport:
+    """Validate and upsert records, committing once per chunk"""
+    report = ImportReport()
+    categories: Dict[str, int] = dict(db.execute(select(Category.slug, Category.id)).all())
+    category_ids = set(categories.values())
+
+    for chunk in _chunks(iter(records), chunk_size):
+        now = datetime.utcnow()
+        valid: Dict[str, Tuple[int, dict, Tuple[str, ...]]] = {}
+        report.rows += len(chunk)
+
+        for row_number, record in chunk:
+            if "__error__" in record:
+                report.error(row_number, record["__error__"])
+                continue
+            try:
+                item = ProductImportRow(**record)
+            except ValidationError as e:
+                report.error(row_number, _error_message(e))
+                continue
+
+            category_id = item.category_id
+            if item.category_slug:
+                category_id = categories.get(item.category_slug)
+            if category_id not in category_ids:
+                report.error(row_number, "Unknown category")
+                continue
+
+            present = set(item.dict(exclude_unset=True))
+            if item.category_slug:
+                present.add("category_id")
+            columns = tuple(column for column in UPDATE_COLUMNS if column in present)
+            row = item.dict(exclude={"category_slug"})
+            row.update(
+                category_id=category_id,
+                images=row["images"] or [],
+                rating=0.0,
+                review_count=0,
+                created_at=now,
+                updated_at=now,
+            )
+            # A later row for the same product wins within a chunk
+            valid[row["sku"] or "slug:" + row["slug"]] = (row_number, row, columns)
+
+        if not valid:
+            continue
+
+        rows = [row for _, row, _ in valid.values()]
+        skus = [row["sku"] for row in rows if row["sku"]]
+        slugs = [row["slug"] for row in rows if not row["sku"]]
+        existing = set()
+        if skus:
+            existing.update(db.execute(select(Product.sku).where(Product.sku.in_(skus))).scalars())
+        if slugs:
+            existing.update("slug:" + slug for slug in db.execute(
+                select(Product.slug).where(Product.slug.in_(slugs))
+            ).scalars())
+
+        try:
+            with db.begin_nested():
+                _write(db, [(row, columns) for _, row, columns in valid.values()])
+            written = list(valid)
+        except DBAPIError:
+            # Find the offending rows one at a time
+            written = []
+            for key, (row_number, row, columns) in valid.items():
+                try:
+                    with db.begin_nested():
+                        _write(db, [(row, columns)])
+                    written.append(key)
+                except DBAPIError as e:
+                    report.error(row_number, _error_message(e))
+
+        db.commit()
+        for key in written:
+            if key in existing:
+                report.updated += 1
+            else:
+                report.created += 1
+
+    # One invalidation for the whole import
+    invalidate_product()
+    search_backend.reset()
+    fuzzy_backend.reset()
+    autocomplete.mark_stale()
+    return report
@@ -0,0 +1,135 @@
+"""Set-based price and stock updates keyed by SKU.
+
+Updates are applied in one transaction. On PostgreSQL each chunk is a single
+``UPDATE products ... FROM (VALUES ...)``; other databases get one
+executemany of a cached ``UPDATE ... WHERE sku = ?``. Rows whose values
+already match are skipped, so repeated syncs only touch what changed.
+Records that fail validation are reported by SKU and the rest still apply.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import String, bindparam, cast, column, select, update, values
+from sqlalchemy.orm import Session
+
+from app.core.cache import invalidate_product
+from app.models.product import Product
+from app.schemas.product import ProductPriceStockUpdate
+
+BULK_UPDATE_CHUNK_SIZE = 1000
+MAX_REPORTED_CHANGES = 100
+PRICE_STOCK_FIELDS = ("price", "discount_price", "stock")
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _update_from_values(db: Session, fields: Tuple[str, ...], rows: List[dict], now: datetime) -> None:
+    table = Product.__table__
+    source = values(
+        column("sku", String),
+        *[column(field, table.c[field].type) for field in fields],
+        name="changes",
+    ).data([tuple(row[key] for key in ("sku",) + fields) for row in rows])
+    # VALUES columns that are all NULL come back untyped, hence the casts
+    assignments = {field: cast(source.c[field], table.c[field].type) for field in fields}
+    db.execute(
+        update(table)
+        .where(table.c.sku == source.c.sku)
+        .values({**assignments, "updated_at": now})
+    )
+
+
+def _update_many(db: Session, fields: Tuple[str, ...], rows: List[dict], now: datetime) -> None:
+    table = Product.__table__
+    assignments = {field: bindparam("b_" + field) for field in fields}
+    statement = (
+        update(table)
+        .where(table.c.sku == bindparam("b_sku"))
+        .values({**assignments, "updated_at": now})
+    )
+    db.connection().execute(
+        statement,
+        [{"b_" + key: row[key] for key in ("sku",) + fields} for row in rows],
+    )
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+def apply_price_stock_updates(db: Session, updates: List[dict]) -> dict:
+    """Apply raw price/stock records by SKU and return a summary of the diff"""
+    # A later record for the same SKU wins
+    records: Dict[str, dict] = {}
+    invalid = []
+    for update_record in updates:
+        try:
+            item = ProductPriceStockUpdate(**update_record)
+        except ValidationError as e:
+            invalid.append({"sku": update_record.get("sku"), "error": _validation_message(e)})
+            continue
+        records[item.sku] = item.dict(exclude_unset=True)
+
+    current: Dict[str, tuple] = {}
+    for skus in _chunks(list(records), BULK_UPDATE_CHUNK_SIZE):
+        rows = db.execute(
+            select(Product.sku, Product.price, Product.discount_price, Product.stock)
+            .where(Product.sku.in_(skus))
+            .with_for_update()
+        )
+        for row in rows:
+            current[row.sku] = (row.price, row.discount_price, row.stock)
+
+    missing = [sku for sku in records if sku not in current]
+    field_counts = {field: 0 for field in PRICE_STOCK_FIELDS}
+    changes = []
+    # Rows grouped by the set of fields they carry, one statement per group
+    groups: Dict[Tuple[str, ...], List[dict]] = {}
+
+    for sku, record in records.items():
+        if sku not in current:
+            continue
+        old = dict(zip(PRICE_STOCK_FIELDS, current[sku]))
+        changed = {
+            field: [old[field], record[field]]
+            for field in PRICE_STOCK_FIELDS
+            if field in record and record[field] != old[field]
+        }
+        if not changed:
+            continue
+        for field in changed:
+            field_counts[field] += 1
+        if len(changes) < MAX_REPORTED_CHANGES:
+            changes.append({"sku": sku, **changed})
+        fields = tuple(field for field in PRICE_STOCK_FIELDS if field in record)
+        groups.setdefault(fields, []).append(record)
+
+    updated = sum(len(rows) for rows in groups.values())
+    if updated:
+        now = datetime.utcnow()
+        write = _update_from_values if db.get_bind().dialect.name == "postgresql" else _update_many
+        for fields, rows in groups.items():
+            for chunk in _chunks(rows, BULK_UPDATE_CHUNK_SIZE):
+                write(db, fields, chunk, now)
+    db.commit()
+
+    if updated:
+        invalidate_product()
+
+    return {
+        "received": len(updates),
+        "matched": len(current),
+        "updated": updated,
+        "unchanged": len(current) - updated,
+        "missing": missing,
+        "invalid": invalid,
+        "fields": field_counts,
+        "changes": changes,
+    }
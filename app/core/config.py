@@ -9,6 +9,14 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     UPLOAD_DIR: str = "uploads"
+    PRODUCT_CACHE_SIZE: int = 5000
+    PRODUCT_CACHE_TTL: int = 300
+    FAST_JSON: bool = False
+    REFERENCE_CACHE_CHECK_INTERVAL: float = 2.0
+    REFERENCE_CACHE_MAX_AGE: int = 60
+    FUZZY_SEARCH_THRESHOLD: float = 0.3
+    CART_SUMMARY_TTL: int = 30
+    GUEST_CART_EXPIRE_DAYS: int = 30
     
     class Config:
         env_file = ".env"
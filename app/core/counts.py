@@ -0,0 +1,46 @@
+"""Count strategies for paginated listings.
+
+``exact`` runs COUNT(*) over the filtered query, ``estimated`` uses the
+PostgreSQL planner's row estimate for it (no scan), and ``cached`` keeps
+exact counts per normalized filter set for ``PRODUCT_CACHE_TTL`` seconds.
+``estimated`` falls back to ``cached`` on databases without a usable planner
+estimate.
+"""
+import json
+from typing import Hashable, Optional, Tuple
+
+from sqlalchemy.orm import Query, Session
+
+from .cache import count_cache
+
+COUNT_STRATEGIES = ("exact", "estimated", "cached", "none")
+
+
+def estimated_count(db: Session, query: Query) -> Optional[int]:
+    """Planner row estimate for ``query``, or None when unavailable"""
+    dialect = db.get_bind().dialect
+    if dialect.name != "postgresql":
+        return None
+    compiled = query.statement.compile(dialect=dialect)
+    plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(db: Session, query: Query, strategy: str, key: Hashable) -> Tuple[int, str]:
+    """Return (total, strategy actually used) for the filtered ``query``"""
+    if strategy == "estimated":
+        estimate = estimated_count(db, query)
+        if estimate is not None:
+            return estimate, "estimated"
+        strategy = "cached"
+
+    if strategy == "cached":
+        total = count_cache.get(key)
+        if total is None:
+            total = query.count()
+            count_cache.set(key, total)
+        return total, "cached"
+
+    return query.count(), "exact"
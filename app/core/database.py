@@ -9,6 +9,20 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def dialect_insert(db):
+    """Return (dialect name, insert construct with upsert support) for ``db``'s bind"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+    else:
+        raise RuntimeError(f"Upserts are not supported on {dialect}")
+    return dialect, insert
+
+
 def get_db():
     db = SessionLocal()
     try:
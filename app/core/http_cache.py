@@ -0,0 +1,120 @@
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models.cache_version import CacheVersion
+
+from .config import settings
+from .database import SessionLocal
+
+
+def bump_version(db: Session, scope: str) -> None:
+    """Bump ``scope`` inside the caller's transaction; other workers see it on commit"""
+    result = db.execute(
+        update(CacheVersion)
+        .where(CacheVersion.scope == scope)
+        .values(version=CacheVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.add(CacheVersion(scope=scope, version=1))
+
+
+class VersionCounter:
+    """Per-scope version numbers kept in the ``cache_versions`` table.
+
+    Every worker reads the same rows, so ETags built from them match across
+    workers. Versions are re-read at most every ``check_interval`` seconds;
+    when one moved because another worker wrote, subscribers are told so
+    they can drop local copies built from the old data.
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._versions: Dict[str, int] = {}
+        self._checked: Dict[str, float] = {}
+        self._subscribers: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[str], None]) -> None:
+        self._subscribers.append(callback)
+
+    def _store(self, versions: Dict[str, int], notify: bool) -> None:
+        changed = []
+        now = time.monotonic()
+        with self._lock:
+            for scope, version in versions.items():
+                if scope in self._versions and self._versions[scope] != version:
+                    changed.append(scope)
+                self._versions[scope] = version
+                self._checked[scope] = now
+        if notify:
+            for scope in changed:
+                for callback in self._subscribers:
+                    callback(scope)
+
+    def bump(self, *scopes: str) -> None:
+        """Bump ``scopes`` in their own transaction, after the caller's write committed"""
+        db = SessionLocal()
+        try:
+            for scope in scopes:
+                bump_version(db, scope)
+            db.commit()
+            versions = dict(db.execute(
+                select(CacheVersion.scope, CacheVersion.version).where(CacheVersion.scope.in_(scopes))
+            ).all())
+        finally:
+            db.close()
+        # This worker already dropped its own copies
+        self._store(versions, notify=False)
+
+    def expire(self, scope: str) -> None:
+        """Re-read ``scope`` on next use, e.g. after a write that bumped it in-transaction"""
+        with self._lock:
+            self._checked.pop(scope, None)
+
+    def refresh(self, *scopes: str) -> None:
+        now = time.monotonic()
+        stale = [
+            scope for scope in scopes
+            if now - self._checked.get(scope, float("-inf")) >= self.check_interval
+        ]
+        if not stale:
+            return
+        db = SessionLocal()
+        try:
+            versions = dict(db.execute(
+                select(CacheVersion.scope, CacheVersion.version).where(CacheVersion.scope.in_(stale))
+            ).all())
+        finally:
+            db.close()
+        self._store({scope: versions.get(scope, 0) for scope in stale}, notify=True)
+
+    def get(self, scope: str) -> int:
+        self.refresh(scope)
+        return self._versions.get(scope, 0)
+
+    def etag(self, *scopes: str) -> str:
+        self.refresh(*scopes)
+        parts = ["%s:%d" % (scope, self._versions.get(scope, 0)) for scope in scopes]
+        return '"%s"' % hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+
+
+catalog_versions = VersionCounter(settings.REFERENCE_CACHE_CHECK_INTERVAL)
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Return a 304 response if the request's If-None-Match matches ``etag``"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+
+    candidates = [tag.strip() for tag in header.split(",")]
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    if "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
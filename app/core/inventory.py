@@ -0,0 +1,109 @@
+"""Stock reservation for checkout.
+
+Every line is taken with a conditional
+``UPDATE products SET stock = stock - :q WHERE id = :id AND stock >= :q``,
+so concurrent checkouts never oversell and never wait on a read-then-write
+lock. Lines are sent as one executemany in product id order, which keeps
+row locks in the same order across transactions and so avoids deadlocks.
+On PostgreSQL, whose driver cannot count rows across an executemany, the
+rows are locked with one ``SELECT ... ORDER BY id FOR UPDATE`` and taken
+with one ``UPDATE products ... FROM (VALUES ...) RETURNING id``.
+
+A short line makes the whole reservation fail. Lines taken before it are
+only undone by rolling back, so callers roll back and then look up which
+lines were short with ``stock_shortages``.
+"""
+from typing import Dict, List
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, bindparam, column, select, update, values
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+
+RESERVE_STOCK = (
+    update(Product.__table__)
+    .where(Product.__table__.c.id == bindparam("b_id"))
+    .where(Product.__table__.c.stock >= bindparam("b_quantity"))
+    .values(stock=Product.__table__.c.stock - bindparam("b_quantity"))
+)
+
+# Errors that mean "lost a race for a lock", so retrying may succeed:
+# Postgres deadlock / serialization failure / lock timeout, MySQL deadlock /
+# lock wait timeout, SQLite busy database
+LOCK_CONFLICT_PGCODES = {"40P01", "40001", "55P03"}
+LOCK_CONFLICT_MYSQL_ERRORS = {1205, 1213}
+
+
+class InsufficientStock(Exception):
+    def __init__(self, quantities: Dict[int, int]):
+        super().__init__("Insufficient stock")
+        self.quantities = quantities
+
+
+def is_lock_conflict(error: DBAPIError) -> bool:
+    orig = error.orig
+    if getattr(orig, "pgcode", None) in LOCK_CONFLICT_PGCODES:
+        return True
+    if orig.args and orig.args[0] in LOCK_CONFLICT_MYSQL_ERRORS:
+        return True
+    message = str(orig).lower()
+    return "database is locked" in message or "database table is locked" in message
+
+
+def _take_from_values(db: Session, params: List[dict]) -> int:
+    table = Product.__table__
+    # The UPDATE's join visits rows in no particular order, so lock them in id
+    # order first
+    product_ids = [row["b_id"] for row in params]
+    db.execute(select(table.c.id).where(table.c.id.in_(product_ids)).order_by(table.c.id).with_for_update())
+    source = values(
+        column("id", Integer), column("quantity", Integer), name="lines",
+    ).data([(row["b_id"], row["b_quantity"]) for row in params])
+    # Only the ids of lines with enough stock come back
+    return len(db.execute(
+        update(table)
+        .where(table.c.id == source.c.id, table.c.stock >= source.c.quantity)
+        .values(stock=table.c.stock - source.c.quantity)
+        .returning(table.c.id)
+    ).all())
+
+
+def _take(db: Session, params: List[dict]) -> int:
+    connection = db.connection()
+    if connection.dialect.name == "postgresql":
+        return _take_from_values(db, params)
+    if connection.dialect.supports_sane_multi_rowcount:
+        return connection.execute(RESERVE_STOCK, params).rowcount
+    # The driver only reports the last statement's rowcount for a batch
+    return sum(connection.execute(RESERVE_STOCK, row).rowcount for row in params)
+
+
+def reserve_stock(db: Session, quantities: Dict[int, int]) -> None:
+    """Decrement stock for {product_id: quantity} in the caller's transaction.
+
+    Raises InsufficientStock if any line is short; the caller must then roll
+    back, as the lines before it have already been taken.
+    """
+    # stock - -q would add stock, so never let a non-positive line through
+    if any(quantity <= 0 for quantity in quantities.values()):
+        raise HTTPException(status_code=400, detail="Quantities must be positive")
+    params = [
+        {"b_id": product_id, "b_quantity": quantity}
+        for product_id, quantity in sorted(quantities.items())
+    ]
+    if _take(db, params) != len(params):
+        raise InsufficientStock(quantities)
+
+
+def stock_shortages(db: Session, quantities: Dict[int, int]) -> List[dict]:
+    """Lines of {product_id: quantity} that current stock cannot cover"""
+    available = dict(db.execute(
+        select(Product.id, Product.stock).where(Product.id.in_(quantities))
+    ).all())
+    return [
+        {"product_id": product_id, "requested": quantity, "available": available.get(product_id) or 0}
+        for product_id, quantity in sorted(quantities.items())
+        if (available.get(product_id) or 0) < quantity
+    ]
@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, tuple_
+
+
+def encode_cursor(sort: str, values: List[Any]) -> str:
+    """Encode the sort name and last row's key values as an opaque cursor"""
+    payload = json.dumps(
+        {"s": sort, "k": values},
+        separators=(",", ":"),
+        default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value),
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> List[Any]:
+    """Decode a (sort_key, id) cursor produced by encode_cursor for the same sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = payload["k"]
+        cursor_sort = payload["s"]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if cursor_sort != sort or not isinstance(values, list) or len(values) != 2:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+    return values
+
+
+def cursor_value(sort_column, value: Any) -> Any:
+    """Turn a decoded cursor value back into the sort column's Python type"""
+    if value is None or not isinstance(sort_column.type, DateTime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(sort_column, id_column, last_value, last_id, descending: bool = False):
+    """Rows strictly after (last_value, last_id) in (sort_column, id_column) order"""
+    if sort_column is id_column:
+        return id_column < last_id if descending else id_column > last_id
+
+    # A row-value comparison, unlike the expanded OR form, is planned as a
+    # range seek on the (sort_column, id) index
+    key = tuple_(sort_column, id_column)
+    last = tuple_(last_value, last_id)
+    return key < last if descending else key > last
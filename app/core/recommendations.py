@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from sqlalchemy import and_, delete, func, insert, literal, select
+from sqlalchemy.orm import Session, aliased
+
+from app.models.order import OrderItem
+from app.models.related import RelatedProduct
+
+DEFAULT_TOP_K = 10
+
+
+def compute_related_products(db: Session, top_k: int = DEFAULT_TOP_K) -> int:
+    """Rebuild related_products from order history; returns rows written.
+
+    Co-occurrence counting runs inside the database as one set-based
+    statement: order_items is self-joined on order_id, pairs are counted
+    per product, and row_number() keeps the top_k neighbours of each.
+    The table is replaced in the caller's transaction, so readers see
+    either the old or the new ranking.
+    """
+    left = aliased(OrderItem)
+    right = aliased(OrderItem)
+
+    pairs = (
+        select(
+            left.product_id.label("product_id"),
+            right.product_id.label("related_product_id"),
+            func.count(func.distinct(left.order_id)).label("score"),
+        )
+        .join(right, and_(right.order_id == left.order_id, right.product_id != left.product_id))
+        .group_by(left.product_id, right.product_id)
+        .subquery()
+    )
+    ranked = select(
+        pairs.c.product_id,
+        pairs.c.related_product_id,
+        pairs.c.score,
+        func.row_number().over(
+            partition_by=pairs.c.product_id,
+            order_by=(pairs.c.score.desc(), pairs.c.related_product_id),
+        ).label("rank"),
+    ).subquery()
+
+    db.execute(delete(RelatedProduct))
+    result = db.execute(
+        insert(RelatedProduct).from_select(
+            ["product_id", "related_product_id", "score", "rank", "computed_at"],
+            select(
+                ranked.c.product_id,
+                ranked.c.related_product_id,
+                ranked.c.score,
+                ranked.c.rank,
+                literal(datetime.utcnow()),
+            ).where(ranked.c.rank <= top_k)
+        )
+    )
+    return result.rowcount
@@ -0,0 +1,75 @@
+"""In-memory copies of small reference tables such as categories and banners.
+
+Every scope has a row in ``cache_versions`` that writers bump in the same
+transaction as their change. Readers compare that one-row version with the
+one their copy was built from, at most every
+``REFERENCE_CACHE_CHECK_INTERVAL`` seconds, so all workers converge on the
+same data without re-reading the tables. ETags hash the encoded body and
+therefore agree across workers too.
+"""
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.cache_version import CacheVersion
+
+from .config import settings
+from .http_cache import bump_version, not_modified
+from .responses import RawJSONResponse
+
+
+class ReferenceCache:
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._entries: Dict[str, Tuple[int, bytes, str]] = {}
+        self._checked: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def expire(self, scope: str) -> None:
+        """Re-check the version on next read, e.g. right after this worker wrote"""
+        with self._lock:
+            self._checked.pop(scope, None)
+
+    def _version(self, db: Session, scope: str) -> int:
+        checked = self._checked.get(scope)
+        if checked is not None and time.monotonic() - checked[0] < self.check_interval:
+            return checked[1]
+        version = db.execute(
+            select(CacheVersion.version).where(CacheVersion.scope == scope)
+        ).scalar() or 0
+        with self._lock:
+            self._checked[scope] = (time.monotonic(), version)
+        return version
+
+    def get(self, db: Session, scope: str, load: Callable[[Session], bytes]) -> Tuple[bytes, str]:
+        """Return (encoded body, ETag) for ``scope``, calling ``load`` when stale"""
+        # Version first: a write racing with load() leaves us a version behind,
+        # which only costs one extra reload
+        version = self._version(db, scope)
+        entry = self._entries.get(scope)
+        if entry is None or entry[0] != version:
+            body = load(db)
+            entry = (version, body, '"%s"' % hashlib.sha1(body).hexdigest()[:20])
+            with self._lock:
+                self._entries[scope] = entry
+        return entry[1], entry[2]
+
+    def response(self, request: Request, db: Session, scope: str, load: Callable[[Session], bytes]) -> Response:
+        body, etag = self.get(db, scope, load)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={settings.REFERENCE_CACHE_MAX_AGE}",
+        }
+        unchanged = not_modified(request, etag)
+        if unchanged is not None:
+            unchanged.headers.update(headers)
+            return unchanged
+        return RawJSONResponse(body, headers=headers)
+
+
+reference_cache = ReferenceCache(settings.REFERENCE_CACHE_CHECK_INTERVAL)
@@ -0,0 +1,39 @@
+import json
+from typing import Any, Iterable
+
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON-compatible content with orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def join_array(blobs: Iterable[bytes]) -> bytes:
+    """Assemble a JSON array from already-encoded elements"""
+    return b"[" + b",".join(blobs) + b"]"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered through orjson, falling back to the stdlib"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """Response for bodies that are already encoded JSON bytes"""
+
+    media_type = "application/json"
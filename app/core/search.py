@@ -0,0 +1,382 @@
+"""Full-text product search.
+
+The backend is picked from the database dialect:
+
+* PostgreSQL - weighted ``tsvector`` expression served by a GIN index
+  (see alembic revision 002), ranked with ``ts_rank_cd``.
+* SQLite - an external-content FTS5 table kept in sync by triggers, ranked with ``bm25``.
+* anything else - an in-process inverted index built on first use, kept
+  in sync by the product routes and rebuilt when another worker bumps the
+  products catalog version.
+
+Typo-tolerant (fuzzy) search over names and brands has its own backend:
+``pg_trgm`` word similarity served by a trigram GIN index on PostgreSQL
+(alembic revision 007), and an in-process trigram index elsewhere.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Set
+
+from sqlalchemy import bindparam, case, event, false, func, literal, literal_column, select, table, text
+
+from app.core.config import settings
+from app.core.database import engine, SessionLocal
+from app.core.http_cache import catalog_versions
+from app.models.product import Product, SQLITE_FTS_DDL
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Field weights shared by every backend: name > brand > description
+FIELD_WEIGHTS = {"name": 3.0, "brand": 2.0, "description": 1.0}
+
+# Document expression; the GIN index in alembic revision 002 is built on the
+# unqualified form, so queries must use exactly the same expression.
+PG_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce({t}name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({t}brand, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce({t}description, '')), 'C')"
+)
+
+
+# Fuzzy-search document; the trigram index in alembic revision 007 is built
+# on the unqualified form
+PG_TRIGRAM_DOCUMENT = "(coalesce({t}name, '') || ' ' || coalesce({t}brand, ''))"
+
+
+def tokenize(value: str) -> List[str]:
+    return TOKEN_RE.findall((value or "").lower())
+
+
+def trigrams(word: str) -> Set[str]:
+    """Trigrams of one word, padded the way pg_trgm pads them"""
+    padded = "  " + word + " "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class SearchBackend:
+    def index_product(self, db, product: Product) -> None:
+        """Add or refresh a product; call after flush, before commit"""
+
+    def remove_product(self, db, product_id: int) -> None:
+        """Drop a product from the index; call before commit"""
+
+    def reset(self) -> None:
+        """Discard in-process state after bulk writes that bypassed the hooks"""
+
+    def filter(self, query, term: str):
+        raise NotImplementedError
+
+    def rank(self, term: str):
+        """SQL expression ordering matches best-first when sorted descending"""
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(SearchBackend):
+    # The index is an expression index, so Postgres keeps it in sync on its own
+
+    def __init__(self):
+        self.document = literal_column(PG_SEARCH_DOCUMENT.format(t="products."))
+
+    def _tsquery(self, term: str):
+        return func.websearch_to_tsquery(literal_column("'english'"), term)
+
+    def filter(self, query, term: str):
+        return query.filter(self.document.op("@@")(self._tsquery(term)))
+
+    def rank(self, term: str):
+        return func.ts_rank_cd(self.document, self._tsquery(term))
+
+
+class SQLiteSearchBackend(SearchBackend):
+    def __init__(self):
+        self.fts = table("products_fts")
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _table_exists(self, connection) -> bool:
+        return connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+        )).first() is not None
+
+    def _ensure_table(self) -> None:
+        # Databases created before the FTS table existed get it built on the
+        # first search; triggers keep it current from then on.
+        if self._ready:
+            return
+        with self._lock:
+            with engine.begin() as connection:
+                if not self._table_exists(connection):
+                    for statement in SQLITE_FTS_DDL:
+                        connection.execute(text(statement))
+                    connection.execute(text("INSERT INTO products_fts (products_fts) VALUES ('rebuild')"))
+                self._ready = True
+
+    def _match(self, term: str) -> str:
+        # Quote every token so user input can't inject FTS5 syntax; the last
+        # token is matched as a prefix so partially typed words still hit.
+        tokens = tokenize(term)
+        if not tokens:
+            return '""'
+        quoted = ['"%s"' % token for token in tokens]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def filter(self, query, term: str):
+        self._ensure_table()
+        matches = (
+            select(literal_column("rowid"))
+            .select_from(self.fts)
+            .where(text("products_fts MATCH :fts_query").bindparams(fts_query=self._match(term)))
+        )
+        return query.filter(Product.id.in_(matches))
+
+    def rank(self, term: str):
+        # bm25() is lower-is-better, negate it so callers can sort descending
+        score = (
+            select(-func.bm25(literal_column("products_fts"), *FIELD_WEIGHTS.values()))
+            .select_from(self.fts)
+            .where(
+                literal_column("products_fts.rowid") == Product.id,
+                text("products_fts MATCH :fts_rank_query").bindparams(fts_rank_query=self._match(term))
+            )
+        )
+        return score.scalar_subquery()
+
+
+class InMemorySearchBackend(SearchBackend):
+    """Inverted index held in this process.
+
+    Each worker builds its own copy on first search and applies the writes it
+    serves itself; when another worker's write bumps the products version
+    the copy is dropped and rebuilt on the next search.
+    """
+
+    # Matches beyond this many are still returned, just ranked last
+    MAX_RANKED = 1000
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._documents: Dict[int, List[str]] = {}
+        self._ready = False
+        self._lock = threading.RLock()
+
+    def _build(self) -> None:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(Product.id, Product.name, Product.brand, Product.description)
+                .execution_options(yield_per=1000)
+            )
+            for row in rows:
+                self._add(row.id, {"name": row.name, "brand": row.brand, "description": row.description})
+        finally:
+            db.close()
+
+    def _ensure_index(self) -> None:
+        if self._ready:
+            return
+        with self._lock:
+            if not self._ready:
+                self._build()
+                self._ready = True
+
+    def _add(self, product_id: int, fields: Dict[str, str]) -> None:
+        weights: Dict[str, float] = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields.get(field)):
+                weights[token] += weight
+        for token, weight in weights.items():
+            self._postings[token][product_id] = weight
+        self._documents[product_id] = list(weights)
+
+    def _remove(self, product_id: int) -> None:
+        for token in self._documents.pop(product_id, []):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(product_id, None)
+                if not postings:
+                    del self._postings[token]
+
+    def index_product(self, db, product: Product) -> None:
+        with self._lock:
+            if not self._ready:
+                return
+            self._remove(product.id)
+            self._add(product.id, {
+                "name": product.name,
+                "brand": product.brand,
+                "description": product.description,
+            })
+
+    def remove_product(self, db, product_id: int) -> None:
+        with self._lock:
+            if self._ready:
+                self._remove(product_id)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._ready = False
+
+    def scores(self, term: str) -> Dict[int, float]:
+        """All matches (all tokens required) scored with a tf-idf sum"""
+        self._ensure_index()
+        tokens = tokenize(term)
+        if not tokens:
+            return {}
+
+        with self._lock:
+            postings = [self._postings.get(token, {}) for token in tokens]
+            if not all(postings):
+                return {}
+            total = len(self._documents) or 1
+            postings.sort(key=len)
+            scores = {}
+            for product_id in postings[0]:
+                if all(product_id in other for other in postings[1:]):
+                    scores[product_id] = sum(
+                        weights[product_id] * math.log(1 + total / len(weights))
+                        for weights in postings
+                    )
+        return scores
+
+    def filter(self, query, term: str):
+        scores = self.scores(term)
+        if not scores:
+            return query.filter(false())
+        # Rendered inline: the match set can exceed the driver's bound
+        # parameter limit
+        ids = bindparam(None, sorted(scores), expanding=True, literal_execute=True)
+        return query.filter(Product.id.in_(ids))
+
+    def rank(self, term: str):
+        scores = self.scores(term)
+        if not scores:
+            # A bare 0 in ORDER BY would be read as a column position
+            return literal(0)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:self.MAX_RANKED]
+        return case(dict(best), value=Product.id, else_=0)
+
+
+class PostgresTrigramBackend(SearchBackend):
+    """``term <% document`` matches when some extent of the document is at least
+    ``threshold`` similar to the term, which the GIN trigram index serves."""
+
+    def __init__(self, threshold: float):
+        self.document = literal_column(PG_TRIGRAM_DOCUMENT.format(t="products."))
+
+        @event.listens_for(engine, "connect")
+        def _set_threshold(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SET pg_trgm.word_similarity_threshold = %s" % float(threshold))
+            cursor.close()
+            dbapi_connection.commit()
+
+    def filter(self, query, term: str):
+        return query.filter(literal(term).op("<%")(self.document))
+
+    def rank(self, term: str):
+        return func.word_similarity(term, self.document)
+
+
+class TrigramSearchBackend(InMemorySearchBackend):
+    """Fuzzy matching over names and brands held in this process.
+
+    Vocabulary words are indexed by trigram, so each query word is only
+    compared with words sharing a trigram with it. A product matches when
+    every query word is at least ``threshold`` similar (Jaccard over
+    trigrams) to one of its words.
+    """
+
+    FIELDS = ("name", "brand")
+
+    def __init__(self, threshold: float):
+        super().__init__()
+        self.threshold = threshold
+        self._words: Dict[str, Set[str]] = defaultdict(set)
+
+    def _add(self, product_id: int, fields: Dict[str, str]) -> None:
+        super()._add(product_id, {field: fields.get(field) for field in self.FIELDS})
+        for word in self._documents[product_id]:
+            for gram in trigrams(word):
+                self._words[gram].add(word)
+
+    def _remove(self, product_id: int) -> None:
+        words = self._documents.get(product_id, [])
+        super()._remove(product_id)
+        for word in words:
+            if word in self._postings:
+                continue
+            for gram in trigrams(word):
+                self._words[gram].discard(word)
+                if not self._words[gram]:
+                    del self._words[gram]
+
+    def reset(self) -> None:
+        with self._lock:
+            super().reset()
+            self._words.clear()
+
+    def scores(self, term: str) -> Dict[int, float]:
+        """All matches scored by similarity times field weight per query word"""
+        self._ensure_index()
+        words = tokenize(term)
+        if not words:
+            return {}
+
+        with self._lock:
+            scores: Dict[int, float] = {}
+            for position, word in enumerate(words):
+                grams = trigrams(word)
+                shared = Counter(
+                    candidate for gram in grams for candidate in self._words.get(gram, ())
+                )
+                best: Dict[int, float] = {}
+                for candidate, common in shared.items():
+                    similarity = common / (len(grams) + len(trigrams(candidate)) - common)
+                    if similarity < self.threshold:
+                        continue
+                    for product_id, weight in self._postings[candidate].items():
+                        best[product_id] = max(best.get(product_id, 0.0), similarity * weight)
+                if position == 0:
+                    scores = best
+                else:
+                    scores = {
+                        product_id: score + best[product_id]
+                        for product_id, score in scores.items()
+                        if product_id in best
+                    }
+                if not scores:
+                    return {}
+        return scores
+
+
+def _create_backend(dialect: str) -> SearchBackend:
+    if dialect == "postgresql":
+        return PostgresSearchBackend()
+    if dialect == "sqlite":
+        return SQLiteSearchBackend()
+    return InMemorySearchBackend()
+
+
+def _create_fuzzy_backend(dialect: str) -> SearchBackend:
+    if dialect == "postgresql":
+        return PostgresTrigramBackend(settings.FUZZY_SEARCH_THRESHOLD)
+    return TrigramSearchBackend(settings.FUZZY_SEARCH_THRESHOLD)
+
+
+search_backend = _create_backend(engine.dialect.name)
+fuzzy_backend = _create_fuzzy_backend(engine.dialect.name)
+
+
+def _reset_stale_indexes(scope: str) -> None:
+    # Another worker changed products; in-process indexes missed those writes
+    if scope == "products":
+        search_backend.reset()
+        fuzzy_backend.reset()
+
+
+catalog_versions.subscribe(_reset_stale_indexes)
@@ -32,6 +32,14 @@ def create_refresh_token(data: dict):
     return encoded_jwt
 
 
+def create_cart_token(cart_id: int):
+    # Names a guest cart; sent back by the client in the X-Cart-Token header
+    expire = datetime.utcnow() + timedelta(days=settings.GUEST_CART_EXPIRE_DAYS)
+    to_encode = {"sub": str(cart_id), "exp": expire, "type": "cart"}
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return encoded_jwt
+
+
 def decode_token(token: str):
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
@@ -1,15 +1,30 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
 
 from app.api.routes import auth, products, cart, orders, reviews, wishlist, banners, admin, upload
+from app.core.autocomplete import autocomplete
+from app.core.carts import CART_TOKEN_HEADER
 from app.core.config import settings
+from app.core.responses import FastJSONResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build typeahead indexes off the request path
+    autocomplete.start()
+    yield
+
 
 app = FastAPI(
     title="ShopHub API",
     description="Modern Ecommerce Platform API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse if settings.FAST_JSON else JSONResponse,
+    lifespan=lifespan
 )
 
 # CORS
@@ -19,6 +34,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browsers only let scripts read these cross-origin if listed
+    expose_headers=[CART_TOKEN_HEADER, "ETag"],
 )
 
 # Create uploads directory
@@ -5,6 +5,8 @@ from .cart import Cart, CartItem
 from .review import Review
 from .wishlist import Wishlist
 from .banner import Banner
+from .related import RelatedProduct
+from .cache_version import CacheVersion
 
 __all__ = [
     "User",
@@ -17,4 +19,6 @@ __all__ = [
     "Review",
     "Wishlist",
     "Banner",
+    "RelatedProduct",
+    "CacheVersion",
 ]
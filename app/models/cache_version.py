@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from app.core.database import Base
+
+
+class CacheVersion(Base):
+    """Version stamp per cached reference table, bumped in the writing transaction"""
+    __tablename__ = "cache_versions"
+
+    scope = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
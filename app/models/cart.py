@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -8,7 +8,7 @@ class Cart(Base):
     __tablename__ = "carts"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True)  # NULL for guest carts
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -29,3 +29,9 @@ class CartItem(Base):
     # Relationships
     cart = relationship("Cart", back_populates="items")
     product = relationship("Product", back_populates="cart_items")
+
+    __table_args__ = (
+        # One line per product; add-to-cart upserts against it. Also serves
+        # lookups by cart_id.
+        Index("uq_cart_items_cart_product", "cart_id", "product_id", unique=True),
+    )
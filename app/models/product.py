@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, Boolean, DateTime, ForeignKey, JSON, DDL, Index, event, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -35,9 +35,9 @@ class Product(Base):
     category_id = Column(Integer, ForeignKey("categories.id"))
     is_featured = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
-    rating = Column(Float, default=0.0)
-    review_count = Column(Integer, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    rating = Column(Float, default=0.0, nullable=False)
+    review_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
@@ -46,3 +46,73 @@ class Product(Base):
     cart_items = relationship("CartItem", back_populates="product")
     order_items = relationship("OrderItem", back_populates="product")
     wishlist_items = relationship("Wishlist", back_populates="product")
+
+    __table_args__ = (
+        # Listing filters; partial on engines that support it
+        Index(
+            "ix_products_active_category_price", "is_active", "category_id", "price",
+            postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")
+        ),
+        Index(
+            "ix_products_brand", "brand",
+            postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")
+        ),
+        # Listing sorts (see PRODUCT_SORTS), whole catalog and within a category;
+        # read backwards for descending sorts
+        Index(
+            "ix_products_sort_price", "price", "id",
+            postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")
+        ),
+        Index(
+            "ix_products_category_sort_price", "category_id", "price", "id",
+            postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")
+        ),
+        Index(
+            "ix_products_sort_created", "created_at", "id",
+            postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")
+        ),
+        Index(
+            "ix_products_category_sort_created", "category_id", "created_at", "id",
+            postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")
+        ),
+        Index(
+            "ix_products_sort_rating", "rating", "id",
+            postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")
+        ),
+        Index(
+            "ix_products_category_sort_rating", "category_id", "rating", "id",
+            postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")
+        ),
+        Index(
+            "ix_products_sort_reviews", "review_count", "id",
+            postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")
+        ),
+        Index(
+            "ix_products_category_sort_reviews", "category_id", "review_count", "id",
+            postgresql_where=text("is_active"), sqlite_where=text("is_active = 1")
+        ),
+    )
+
+
+# SQLite full-text index used by app/core/search.py: an external-content FTS5
+# table over products, kept in sync by triggers
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts "
+    "USING fts5(name, brand, description, content='products', content_rowid='id', "
+    "tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts (rowid, name, brand, description) "
+    "VALUES (new.id, new.name, new.brand, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts (products_fts, rowid, name, brand, description) "
+    "VALUES ('delete', old.id, old.name, old.brand, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, brand, description ON products BEGIN "
+    "INSERT INTO products_fts (products_fts, rowid, name, brand, description) "
+    "VALUES ('delete', old.id, old.name, old.brand, old.description); "
+    "INSERT INTO products_fts (rowid, name, brand, description) "
+    "VALUES (new.id, new.name, new.brand, new.description); END",
+]
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Product.__table__, "before_drop", DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"))
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.core.database import Base
+
+
+class RelatedProduct(Base):
+    """Precomputed "frequently bought together" neighbours, ranked per product"""
+    __tablename__ = "related_products"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    related_product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    score = Column(Integer, nullable=False)  # Orders containing both products
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    related_product = relationship("Product", foreign_keys=[related_product_id])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -15,3 +15,7 @@ class Wishlist(Base):
     # Relationships
     user = relationship("User", back_populates="wishlist")
     product = relationship("Product", back_populates="wishlist_items")
+
+    __table_args__ = (
+        Index("ix_wishlist_user_product", "user_id", "product_id"),
+    )
@@ -1,17 +1,20 @@
 from .user import UserCreate, UserLogin, UserResponse, Token
-from .product import ProductCreate, ProductUpdate, ProductResponse, CategoryCreate, CategoryResponse
+from .product import (
+    ProductCreate, ProductImportRow, ProductUpdate, ProductPriceStockUpdate, ProductResponse, ProductBatchResponse,
+    CategoryCreate, CategoryResponse,
+)
 from .order import OrderCreate, OrderResponse, OrderItemResponse
-from .cart import CartResponse, CartItemCreate, CartItemUpdate
+from .cart import CartResponse, CartItemCreate, CartItemUpdate, CartOperation, CartBatchRequest, CartSummaryResponse
 from .review import ReviewCreate, ReviewResponse
 from .wishlist import WishlistResponse
 from .banner import BannerCreate, BannerResponse
 
 __all__ = [
     "UserCreate", "UserLogin", "UserResponse", "Token",
-    "ProductCreate", "ProductUpdate", "ProductResponse",
+    "ProductCreate", "ProductImportRow", "ProductUpdate", "ProductPriceStockUpdate", "ProductResponse", "ProductBatchResponse",
     "CategoryCreate", "CategoryResponse",
     "OrderCreate", "OrderResponse", "OrderItemResponse",
-    "CartResponse", "CartItemCreate", "CartItemUpdate",
+    "CartResponse", "CartItemCreate", "CartItemUpdate", "CartOperation", "CartBatchRequest", "CartSummaryResponse",
     "ReviewCreate", "ReviewResponse",
     "WishlistResponse",
     "BannerCreate", "BannerResponse",
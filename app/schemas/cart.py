@@ -1,15 +1,30 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from sqlalchemy.orm import joinedload
+from app.models.cart import Cart, CartItem
+from app.models.product import Product
 from .product import ProductResponse
 
 
 class CartItemCreate(BaseModel):
     product_id: int
-    quantity: int = 1
+    quantity: int = Field(1, gt=0)
 
 
 class CartItemUpdate(BaseModel):
-    quantity: int
+    quantity: int = Field(gt=0)
+
+
+class CartOperation(BaseModel):
+    # add: increase quantity, set: replace it, remove: drop the line; lines
+    # left at zero or below are removed
+    op: Literal["add", "set", "remove"]
+    product_id: int
+    quantity: int = 1
+
+
+class CartBatchRequest(BaseModel):
+    operations: List[CartOperation]
 
 
 class CartItemResponse(BaseModel):
@@ -22,8 +37,21 @@ class CartItemResponse(BaseModel):
         from_attributes = True
 
 
+# Loader options that fetch everything CartResponse reads: the cart, its
+# items, their products and categories in one joined query
+CART_RESPONSE_LOAD = (
+    joinedload(Cart.items).joinedload(CartItem.product).joinedload(Product.category),
+)
+
+
+class CartSummaryResponse(BaseModel):
+    line_count: int
+    item_count: int
+    subtotal: float
+
+
 class CartResponse(BaseModel):
-    id: int
+    id: Optional[int] = None  # None for a guest who has no cart yet
     items: List[CartItemResponse]
 
     class Config:
@@ -1,6 +1,8 @@
 from pydantic import BaseModel
 from typing import List, Dict, Any
 from datetime import datetime
+from sqlalchemy.orm import selectinload
+from app.models.order import Order
 
 
 class OrderItemBase(BaseModel):
@@ -21,6 +23,13 @@ class OrderCreate(BaseModel):
     payment_method: str
 
 
+# Loader options that fetch everything OrderResponse reads;
+# selectinload loads the items of every order in one extra query
+ORDER_RESPONSE_LOAD = (
+    selectinload(Order.items),
+)
+
+
 class OrderResponse(BaseModel):
     id: int
     order_number: str
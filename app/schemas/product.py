@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, validator
 from typing import Optional, List
 from datetime import datetime
+from sqlalchemy.orm import joinedload
+from app.models.product import Product
 
 
 class CategoryBase(BaseModel):
@@ -40,6 +42,13 @@ class ProductCreate(ProductBase):
     images: Optional[List[str]] = []
 
 
+class ProductImportRow(ProductCreate):
+    # Rows may name their category by slug instead of id
+    category_id: Optional[int] = None
+    category_slug: Optional[str] = None
+    is_active: bool = True
+
+
 class ProductUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
@@ -52,6 +61,26 @@ class ProductUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+class ProductPriceStockUpdate(BaseModel):
+    # Omitted fields are left unchanged; only discount_price may be cleared
+    sku: str
+    price: Optional[float] = Field(None, ge=0)
+    discount_price: Optional[float] = Field(None, ge=0)
+    stock: Optional[int] = Field(None, ge=0)
+
+    @validator("price", "stock")
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
+
+# Loader options that fetch everything ProductResponse reads
+PRODUCT_RESPONSE_LOAD = (
+    joinedload(Product.category),
+)
+
+
 class ProductResponse(ProductBase):
     id: int
     images: List[str]
@@ -63,3 +92,8 @@ class ProductResponse(ProductBase):
 
     class Config:
         from_attributes = True
+
+
+class ProductBatchResponse(BaseModel):
+    products: List[ProductResponse]
+    missing: List[int]
@@ -1,8 +1,17 @@
 from pydantic import BaseModel
 from datetime import datetime
+from sqlalchemy.orm import joinedload
+from app.models.product import Product
+from app.models.wishlist import Wishlist
 from .product import ProductResponse
 
 
+# Loader options that fetch everything WishlistResponse reads
+WISHLIST_RESPONSE_LOAD = (
+    joinedload(Wishlist.product).joinedload(Product.category),
+)
+
+
 class WishlistResponse(BaseModel):
     id: int
     product_id: int
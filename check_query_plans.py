@@ -0,0 +1,146 @@
+"""Check that the hot-path queries are served by an index.
+
+Runs EXPLAIN for each query the API issues on every request and fails if
+the planner has to scan the whole table or sort it. Works against PostgreSQL
+and SQLite.
+
+    python check_query_plans.py
+"""
+import json
+import sys
+
+from sqlalchemy import select, text
+
+from app.core.database import engine
+from app.models.cart import CartItem
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.models.review import Review
+from app.models.wishlist import Wishlist
+
+# name -> (statement, table that must not be scanned)
+HOT_QUERIES = {
+    "product listing by category and price": (
+        select(Product).where(
+            Product.is_active == True,
+            Product.category_id == 1,
+            Product.price >= 10,
+            Product.price <= 100,
+        ),
+        "products",
+    ),
+    "product listing by brand": (
+        select(Product).where(Product.is_active == True, Product.brand == "Samsung"),
+        "products",
+    ),
+    "product listing sorted by price": (
+        select(Product).where(Product.is_active == True).order_by(Product.price, Product.id).limit(24),
+        "products",
+    ),
+    "cheapest products in a category": (
+        select(Product)
+        .where(Product.is_active == True, Product.category_id == 1)
+        .order_by(Product.price, Product.id)
+        .limit(24),
+        "products",
+    ),
+    "newest products in a category": (
+        select(Product)
+        .where(Product.is_active == True, Product.category_id == 1)
+        .order_by(Product.created_at.desc(), Product.id.desc())
+        .limit(24),
+        "products",
+    ),
+    "most popular products": (
+        select(Product)
+        .where(Product.is_active == True)
+        .order_by(Product.review_count.desc(), Product.id.desc())
+        .limit(24),
+        "products",
+    ),
+    "cart items of a cart": (
+        select(CartItem).where(CartItem.cart_id == 1),
+        "cart_items",
+    ),
+    "order items of an order": (
+        select(OrderItem).where(OrderItem.order_id == 1),
+        "order_items",
+    ),
+    "reviews of a product": (
+        select(Review).where(Review.product_id == 1).order_by(Review.created_at.desc()),
+        "reviews",
+    ),
+    "wishlist of a user": (
+        select(Wishlist).where(Wishlist.user_id == 1),
+        "wishlist",
+    ),
+    "orders of a user": (
+        select(Order).where(Order.user_id == 1).order_by(Order.created_at.desc()),
+        "orders",
+    ),
+}
+
+
+def _walk_plan(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk_plan(child)
+
+
+def _postgres_seq_scans(connection, sql: str, table: str) -> list:
+    plan = connection.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return [
+        node["Node Type"]
+        for node in _walk_plan(plan[0]["Plan"])
+        if (node["Node Type"] == "Seq Scan" and node.get("Relation Name") == table)
+        or node["Node Type"] == "Sort"
+    ]
+
+
+def _sqlite_full_scans(connection, sql: str, table: str) -> list:
+    rows = connection.execute(text("EXPLAIN QUERY PLAN " + sql)).all()
+    return [
+        row.detail
+        for row in rows
+        if (row.detail.startswith("SCAN " + table) and "USING" not in row.detail)
+        or row.detail.startswith("USE TEMP B-TREE FOR ORDER BY")
+    ]
+
+
+def check_query_plans() -> bool:
+    dialect = engine.dialect
+    if dialect.name not in ("postgresql", "sqlite"):
+        print(f"❌ Unsupported database: {dialect.name}")
+        return False
+
+    ok = True
+    with engine.connect() as connection:
+        if dialect.name == "postgresql":
+            # Small tables are cheaper to scan, so make the planner prefer
+            # any usable index; a remaining Seq Scan means there is none
+            connection.execute(text("SET enable_seqscan = off"))
+        else:
+            # Without statistics SQLite prefers any index with an equality
+            # match on is_active over one that avoids the sort
+            connection.execute(text("ANALYZE"))
+
+        for name, (statement, table) in HOT_QUERIES.items():
+            sql = str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+            if dialect.name == "postgresql":
+                scans = _postgres_seq_scans(connection, sql, table)
+            else:
+                scans = _sqlite_full_scans(connection, sql, table)
+
+            if scans:
+                ok = False
+                print(f"❌ {name}: full scan or sort of {table} ({', '.join(scans)})")
+            else:
+                print(f"✅ {name}")
+
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_query_plans() else 1)
@@ -0,0 +1,26 @@
+"""Recompute "frequently bought together" recommendations from order history"""
+import sys
+
+from app.core.database import SessionLocal
+from app.core.recommendations import compute_related_products, DEFAULT_TOP_K
+
+
+def main():
+    top_k = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TOP_K
+    db = SessionLocal()
+
+    try:
+        print(f"Computing top {top_k} related products per product...")
+        rows = compute_related_products(db, top_k)
+        db.commit()
+        print(f"✅ Stored {rows} related product rows")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,8 @@ from app.models.order import Order, OrderItem
 from app.models.review import Review
 from app.models.wishlist import Wishlist
 from app.models.banner import Banner
+from app.models.related import RelatedProduct
+from app.models.cache_version import CacheVersion
 
 def create_tables():
     print("Creating all tables...")
@@ -0,0 +1,41 @@
+"""Bulk import products from a CSV or JSON Lines file
+
+    python import_products.py products.csv
+    python import_products.py products.jsonl
+"""
+import sys
+import time
+
+from app.core.catalog_import import import_products, read_records
+from app.core.database import SessionLocal
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+
+    path = sys.argv[1]
+    format = "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+    db = SessionLocal()
+
+    try:
+        started = time.perf_counter()
+        with open(path, newline="", encoding="utf-8") as f:
+            report = import_products(db, read_records(f, format))
+        elapsed = time.perf_counter() - started
+
+        print(f"✅ Imported {report.rows} rows in {elapsed:.1f}s: "
+              f"{report.created} created, {report.updated} updated, {report.failed} failed")
+        for error in report.errors:
+            print(f"  row {error['row']}: {error['error']}")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Delete guest carts whose cart tokens have expired; run daily, e.g. from cron"""
+from datetime import datetime, timedelta
+
+from app.core.carts import purge_guest_carts
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+
+def main():
+    created_before = datetime.utcnow() - timedelta(days=settings.GUEST_CART_EXPIRE_DAYS)
+    db = SessionLocal()
+
+    try:
+        print(f"Deleting guest carts created before {created_before:%Y-%m-%d %H:%M}...")
+        carts = purge_guest_carts(db, created_before)
+        db.commit()
+        print(f"✅ Deleted {carts} guest carts")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
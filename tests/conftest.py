@@ -0,0 +1,90 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point the app at a scratch SQLite
+# database before anything under app/ is imported
+_db_dir = tempfile.mkdtemp(prefix="shophub-tests-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_db_dir, "test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core import cache
+from app.core.database import Base, SessionLocal, engine
+from app.core.security import create_access_token
+from app.main import app
+from app.models import *
+
+
+@pytest.fixture(autouse=True)
+def database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+    for name in ("product_cache", "product_list_cache", "facet_cache", "cart_summary_cache", "count_cache"):
+        getattr(cache, name).clear()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client():
+    # No context manager: startup work such as the autocomplete build
+    # is not needed here
+    return TestClient(app)
+
+
+@pytest.fixture
+def category(db):
+    category = Category(name="Electronics", slug="electronics")
+    db.add(category)
+    db.commit()
+    return category
+
+
+@pytest.fixture
+def make_product(db, category):
+    def make_product(stock=10, price=10.0):
+        count = db.query(Product).count()
+        product = Product(
+            name=f"Product {count}", slug=f"product-{count}", sku=f"SKU-{count}",
+            price=price, stock=stock, category_id=category.id, images=[],
+        )
+        db.add(product)
+        db.commit()
+        return product
+    return make_product
+
+
+@pytest.fixture
+def make_user(db):
+    def make_user(with_cart=True):
+        count = db.query(User).count()
+        user = User(email=f"user{count}@example.com", username=f"user{count}", hashed_password="x")
+        db.add(user)
+        db.flush()
+        if with_cart:
+            db.add(Cart(user_id=user.id))
+        db.commit()
+        return {"Authorization": "Bearer " + create_access_token({"sub": str(user.id)})}
+    return make_user
+
+
+@pytest.fixture
+def statements():
+    """SQL statements sent to the database while the test runs"""
+    sent = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield sent
+    event.remove(engine, "before_cursor_execute", record)
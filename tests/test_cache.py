@@ -0,0 +1,21 @@
+from app.core.cache import TTLCache
+
+
+def test_set_is_skipped_after_an_invalidation_during_the_read():
+    cache = TTLCache(maxsize=10, ttl=60)
+    generation = cache.generation
+    # A write commits and invalidates while the reader is still querying
+    cache.delete(1)
+    cache.set(1, b"stale", generation)
+    assert cache.get(1) is None
+
+    generation = cache.generation
+    cache.set(1, b"fresh", generation)
+    assert cache.get(1) == b"fresh"
+
+
+def test_set_without_a_generation_always_stores():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.clear()
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
@@ -0,0 +1,50 @@
+"""Each cart endpoint runs a fixed number of statements, however big the cart"""
+import pytest
+
+
+@pytest.fixture
+def cart(client, make_user, make_product):
+    headers = make_user()
+    products = [make_product() for _ in range(5)]
+    for product in products:
+        client.post("/api/cart/items", headers=headers, json={"product_id": product.id, "quantity": 1})
+    items = client.get("/api/cart", headers=headers).json()["items"]
+    # Plain ids: touching an expired ORM object would itself run a query
+    return headers, items, make_product().id
+
+
+def test_get_cart(client, cart, statements):
+    headers, _, _ = cart
+    assert client.get("/api/cart", headers=headers).status_code == 200
+    assert len(statements) == 2
+
+
+def test_add_to_cart(client, cart, statements):
+    headers, _, product_id = cart
+    response = client.post("/api/cart/items", headers=headers, json={"product_id": product_id, "quantity": 2})
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 6
+    assert len(statements) == 3
+
+
+def test_update_cart_item(client, cart, statements):
+    headers, items, _ = cart
+    response = client.put(f"/api/cart/items/{items[0]['id']}", headers=headers, json={"quantity": 4})
+    assert response.status_code == 200
+    assert len(statements) == 3
+
+
+def test_remove_cart_item(client, cart, statements):
+    headers, items, _ = cart
+    response = client.delete(f"/api/cart/items/{items[0]['id']}", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 4
+    assert len(statements) == 3
+
+
+def test_clear_cart(client, cart, statements):
+    headers, _, _ = cart
+    response = client.delete("/api/cart/clear", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+    assert len(statements) == 3
@@ -0,0 +1,34 @@
+from app.core.catalog_import import import_products, read_records
+from app.models.product import Product
+
+
+def test_update_leaves_columns_missing_from_the_csv(db, category):
+    category = category.id
+    lines = [
+        "name,slug,sku,price,stock,description,brand,images,category_id\n",
+        f"Lamp,lamp,S1,10,5,Warm light,Lumo,a.jpg|b.jpg,{category}\n",
+    ]
+    report = import_products(db, read_records(lines, "csv"))
+    assert report.created == 1
+
+    report = import_products(db, read_records(["name,slug,sku,price,stock,category_id\n", f"Lamp,lamp,S1,12,7,{category}\n"], "csv"))
+    assert report.updated == 1
+
+    db.expire_all()
+    product = db.query(Product).filter_by(sku="S1").one()
+    assert (product.price, product.stock) == (12, 7)
+    assert (product.description, product.brand, product.images) == ("Warm light", "Lumo", ["a.jpg", "b.jpg"])
+
+
+def test_update_only_overwrites_keys_a_jsonl_row_sets(db, category):
+    category = category.id
+    first = f'{{"name":"Lamp","slug":"lamp","sku":"S1","price":10,"brand":"Lumo","is_featured":true,"category_id":{category}}}\n'
+    second = f'{{"name":"Lamp","slug":"lamp","sku":"S1","price":11,"discount_price":null,"category_id":{category}}}\n'
+    import_products(db, read_records([first], "jsonl"))
+    report = import_products(db, read_records([second], "jsonl"))
+    assert report.updated == 1
+
+    db.expire_all()
+    product = db.query(Product).filter_by(sku="S1").one()
+    assert product.price == 11 and product.discount_price is None
+    assert product.brand == "Lumo" and product.is_featured
@@ -0,0 +1,20 @@
+from app.core.catalog_updates import apply_price_stock_updates
+from app.models.product import Product
+
+
+def test_invalid_records_are_reported_per_sku(db, make_product):
+    for _ in range(4):
+        make_product()
+
+    summary = apply_price_stock_updates(db, [
+        {"sku": "SKU-0", "price": None},
+        {"sku": "SKU-1", "stock": -1},
+        {"sku": "SKU-2", "price": 12.5, "discount_price": None},
+        {"sku": "SKU-3", "stock": None, "discount_price": 5},
+    ])
+
+    assert [record["sku"] for record in summary["invalid"]] == ["SKU-0", "SKU-1", "SKU-3"]
+    assert summary["updated"] == 1
+    db.expire_all()
+    prices = dict(db.query(Product.sku, Product.price))
+    assert prices == {"SKU-0": 10.0, "SKU-1": 10.0, "SKU-2": 12.5, "SKU-3": 10.0}
@@ -0,0 +1,105 @@
+"""Parallel checkouts must never oversell and never fail with a 500"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.cache import product_list_cache
+from app.core.http_cache import catalog_versions
+from app.core.inventory import reserve_stock
+from app.main import app
+from app.models.order import Order
+from app.models.product import Product
+
+ORDER = {"shipping_address": {"line1": "1 Test Street"}, "payment_method": "cod"}
+
+
+def _fill_carts(client, headers, product_ids):
+    for index, user in enumerate(headers):
+        # Half the carts list the products in reverse order
+        ordered = product_ids if index % 2 else list(reversed(product_ids))
+        operations = [{"op": "add", "product_id": product_id, "quantity": 1} for product_id in ordered]
+        assert client.post("/api/cart/batch", headers=user, json={"operations": operations}).status_code == 200
+
+
+def _checkout_in_parallel(headers):
+    def checkout(user):
+        return TestClient(app).post("/api/orders", headers=user, json=ORDER)
+
+    with ThreadPoolExecutor(max_workers=len(headers)) as pool:
+        return list(pool.map(checkout, headers))
+
+
+@pytest.mark.parametrize("shoppers, stock, products", [(8, 3, 1), (16, 5, 3)])
+def test_parallel_checkouts_never_oversell(client, db, make_user, make_product, shoppers, stock, products):
+    product_ids = [make_product(stock=stock).id for _ in range(products)]
+    headers = [make_user() for _ in range(shoppers)]
+    _fill_carts(client, headers, product_ids)
+
+    responses = _checkout_in_parallel(headers)
+    statuses = [response.status_code for response in responses]
+
+    assert set(statuses) <= {200, 409, 503}, [response.json() for response in responses]
+    placed = statuses.count(200)
+    # All stock sells unless some checkouts ran out of retries
+    assert placed == stock or (503 in statuses and 0 < placed < stock)
+    db.expire_all()
+    assert db.query(Order).count() == placed
+    assert {p.stock for p in db.query(Product).filter(Product.id.in_(product_ids))} == {stock - placed}
+    for response in responses:
+        if response.status_code == 409:
+            assert response.json()["detail"]["items"][0]["available"] < 1
+
+
+def test_short_line_is_reported_and_nothing_is_taken(client, db, make_user, make_product):
+    plenty, scarce = make_product(stock=10).id, make_product(stock=1).id
+    user = make_user()
+    client.post("/api/cart/batch", headers=user, json={"operations": [
+        {"op": "add", "product_id": plenty, "quantity": 2},
+        {"op": "add", "product_id": scarce, "quantity": 3},
+    ]})
+
+    response = client.post("/api/orders", headers=user, json=ORDER)
+    assert response.status_code == 409
+    assert response.json()["detail"]["items"] == [{"product_id": scarce, "requested": 3, "available": 1}]
+    db.expire_all()
+    assert [db.get(Product, plenty).stock, db.get(Product, scarce).stock] == [10, 1]
+    assert len(client.get("/api/cart", headers=user).json()["items"]) == 2
+
+
+def test_rollback_undoes_a_reservation(db, make_product):
+    product_id = make_product(stock=10).id
+    reserve_stock(db, {product_id: 4})
+    db.rollback()
+    assert db.get(Product, product_id).stock == 10
+
+
+def test_non_positive_quantities_are_rejected(client, db, make_user, make_product):
+    product_id = make_product(stock=10).id
+    with pytest.raises(HTTPException):
+        reserve_stock(db, {product_id: -3})
+    db.rollback()
+    assert db.get(Product, product_id).stock == 10
+
+    user = make_user()
+    for quantity in (0, -3):
+        response = client.post("/api/cart/items", headers=user, json={"product_id": product_id, "quantity": quantity})
+        assert response.status_code == 422
+
+
+def test_checkout_only_drops_the_cached_products(client, db, make_user, make_product):
+    product_id = make_product(stock=10).id
+    user = make_user()
+    client.post("/api/cart/items", headers=user, json={"product_id": product_id, "quantity": 2})
+    catalog_versions.expire("products")
+    version = catalog_versions.get("products")
+    assert client.get(f"/api/products/{product_id}").json()["stock"] == 10
+    client.get("/api/products")
+
+    assert client.post("/api/orders", headers=user, json=ORDER).status_code == 200
+
+    assert client.get(f"/api/products/{product_id}").json()["stock"] == 8
+    assert product_list_cache.stats()["size"] == 1
+    catalog_versions.expire("products")
+    assert catalog_versions.get("products") == version
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from app.core.carts import CART_TOKEN_HEADER, purge_guest_carts
+from app.models.cart import Cart, CartItem
+
+
+def test_reading_without_a_token_creates_nothing(client, db):
+    for _ in range(3):
+        response = client.get("/api/cart")
+        assert response.status_code == 200
+        assert response.json() == {"id": None, "items": []}
+        assert CART_TOKEN_HEADER not in response.headers
+    assert db.query(Cart).count() == 0
+
+
+def test_first_write_creates_the_guest_cart(client, db, make_product):
+    product_id = make_product().id
+    response = client.post("/api/cart/items", json={"product_id": product_id, "quantity": 2})
+    token = response.headers[CART_TOKEN_HEADER]
+
+    response = client.get("/api/cart", headers={CART_TOKEN_HEADER: token})
+    assert [(item["product_id"], item["quantity"]) for item in response.json()["items"]] == [(product_id, 2)]
+    assert db.query(Cart).count() == 1
+
+
+def test_purge_removes_only_expired_guest_carts(client, db, make_user, make_product):
+    make_user()
+    product_id = make_product().id
+    for _ in range(2):
+        client.post("/api/cart/items", json={"product_id": product_id})
+    old, new = db.query(Cart).filter(Cart.user_id.is_(None)).order_by(Cart.id).all()
+    old.created_at = datetime.utcnow() - timedelta(days=40)
+    db.commit()
+
+    assert purge_guest_carts(db, datetime.utcnow() - timedelta(days=30)) == 1
+    db.commit()
+    assert [cart.id for cart in db.query(Cart).filter(Cart.user_id.is_(None))] == [new.id]
+    assert db.query(Cart).filter(Cart.user_id.isnot(None)).count() == 1
+    assert {item.cart_id for item in db.query(CartItem)} == {new.id}
+
+
+def _guest_cart(client, *lines):
+    token = None
+    for product_id, quantity in lines:
+        headers = {CART_TOKEN_HEADER: token} if token else {}
+        response = client.post("/api/cart/items", json={"product_id": product_id, "quantity": quantity}, headers=headers)
+        token = response.headers.get(CART_TOKEN_HEADER, token)
+    return token
+
+
+def test_register_and_login_merge_the_guest_cart(client, db, make_product):
+    first, second = make_product().id, make_product().id
+    account = {"email": "shopper@example.com", "username": "shopper", "password": "secret"}
+
+    token = _guest_cart(client, (first, 2))
+    response = client.post("/api/auth/register", json=account, headers={CART_TOKEN_HEADER: token})
+    auth = {"Authorization": "Bearer " + response.json()["access_token"]}
+    assert db.query(Cart).count() == 1
+
+    # A second guest session merges into the now existing user cart
+    token = _guest_cart(client, (first, 1), (second, 3))
+    login = {"email": account["email"], "password": account["password"]}
+    assert client.post("/api/auth/login", json=login, headers={CART_TOKEN_HEADER: token}).status_code == 200
+
+    items = client.get("/api/cart", headers=auth).json()["items"]
+    assert sorted((item["product_id"], item["quantity"]) for item in items) == [(first, 3), (second, 3)]
+    assert db.query(Cart).filter(Cart.user_id.is_(None)).count() == 0
+    assert db.query(Cart).count() == 1
+
+
+def test_cors_exposes_the_cart_token_and_etag(client):
+    response = client.get("/api/cart", headers={"Origin": "https://shop.example.com"})
+    exposed = {header.strip().lower() for header in response.headers["access-control-expose-headers"].split(",")}
+    assert {CART_TOKEN_HEADER.lower(), "etag"} <= exposed
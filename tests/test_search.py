@@ -0,0 +1,65 @@
+from app.core import search
+from app.core.http_cache import bump_version, catalog_versions
+from app.models.product import Product
+
+
+def _add_products(db, category, count, name="Bulk Gadget"):
+    db.add_all([
+        Product(name=f"{name} {index}", slug=f"{name.lower().replace(' ', '-')}-{index}",
+                price=1.0, category_id=category.id, images=[])
+        for index in range(count)
+    ])
+    db.commit()
+
+
+def test_in_memory_search_returns_every_match(db, category):
+    _add_products(db, category, 1500)
+    backend = search.InMemorySearchBackend()
+
+    query = backend.filter(db.query(Product), "gadget")
+    assert query.count() == 1500
+    ranked = query.order_by(backend.rank("gadget").desc(), Product.id).all()
+    assert len(ranked) == 1500
+
+
+def test_in_memory_index_resets_when_another_worker_writes(db, category, monkeypatch):
+    _add_products(db, category, 3)
+    backend = search.InMemorySearchBackend()
+    monkeypatch.setattr(search, "search_backend", backend)
+    assert backend.filter(db.query(Product), "gadget").count() == 3
+    catalog_versions.expire("products")
+    catalog_versions.get("products")
+
+    # A write served by another worker: rows and version change, no hooks run here
+    _add_products(db, category, 2, name="Other Gadget")
+    bump_version(db, "products")
+    db.commit()
+    catalog_versions.expire("products")
+    catalog_versions.get("products")
+
+    assert backend.filter(db.query(Product), "gadget").count() == 5
+
+
+def test_fuzzy_search_returns_every_match(db, category):
+    _add_products(db, category, 1500)
+    backend = search.TrigramSearchBackend(0.3)
+
+    query = backend.filter(db.query(Product), "gadgte")
+    assert query.count() == 1500
+
+
+def test_fuzzy_index_resets_when_another_worker_writes(db, category, monkeypatch):
+    _add_products(db, category, 3)
+    backend = search.TrigramSearchBackend(0.3)
+    monkeypatch.setattr(search, "fuzzy_backend", backend)
+    assert backend.filter(db.query(Product), "gadget").count() == 3
+    catalog_versions.expire("products")
+    catalog_versions.get("products")
+
+    _add_products(db, category, 2, name="Other Gadget")
+    bump_version(db, "products")
+    db.commit()
+    catalog_versions.expire("products")
+    catalog_versions.get("products")
+
+    assert backend.filter(db.query(Product), "gadget").count() == 5